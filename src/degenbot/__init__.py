@@ -11,7 +11,7 @@ from .arbitrage import (
     UniswapLpCycle,
 )
 from .chainlink import ChainlinkPriceContract
-from .config import get_web3, set_web3
+from .config import build_http_web3, get_web3, set_web3
 from .fork import AnvilFork
 from .functions import next_base_fee
 from .logging import logger
@@ -1,16 +1,55 @@
 from fractions import Fraction
-from typing import List
+from math import isqrt
+from typing import Callable, Dict, List, Optional, Tuple
 
-from eth_utils.address import to_checksum_address
+import eth_abi
+import numpy as np
+from eth_abi.exceptions import DecodingError
 from scipy import optimize  # type: ignore[import]
+from web3 import Web3
+from web3.exceptions import Web3Exception
 
 from ..baseclasses import ArbitrageHelper
 from ..erc20_token import Erc20Token
 from ..config import get_web3
+from ..constants import MULTICALL3_ADDRESS
+from ..functions import get_checksum_address
 from ..uniswap.v2_liquidity_pool import LiquidityPool
 from ..uniswap.v2_functions import get_v2_pools_from_token_path
 from ..uniswap.managers import UniswapV2LiquidityPoolManager
 from ..logging import logger
+from ..manager import Erc20TokenHelperManager
+from .solver import brent_bounded
+
+# Function selectors for the Multicall3 reserve lookup
+_AGGREGATE_SELECTOR = Web3.keccak(text="aggregate((address,bytes)[])")[:4]
+_GET_RESERVES_SELECTOR = Web3.keccak(text="getReserves()")[:4]
+
+
+def _negative_profit(
+    x,
+    swap_steps: Tuple[Tuple[Callable[[bool, int], int], bool], ...],
+    calculate_repay: Callable[[bool, int], int],
+    repay_zero_for_one: bool,
+    evaluations: Dict[int, Tuple[int, int]],
+) -> float:
+    """
+    Optimizer objective for the router swap path. Everything it needs is
+    passed in, so no attributes are looked up on the helper for each
+    evaluation. The exact profit and swap output are recorded in
+    `evaluations`, keyed by the borrow amount.
+    """
+
+    # round the input down, so the pool calculations use integer math
+    borrow = int(x)
+
+    swap_out = borrow
+    for calculate_swap, zero_for_one in swap_steps:
+        swap_out = calculate_swap(zero_for_one, swap_out)
+
+    profit = swap_out - calculate_repay(repay_zero_for_one, borrow)
+    evaluations[borrow] = profit, swap_out
+    return -float(profit)
 
 
 class FlashBorrowToRouterSwap(ArbitrageHelper):
@@ -54,37 +93,63 @@ class FlashBorrowToRouterSwap(ArbitrageHelper):
 
         self.swap_router_address = swap_router_address
 
-        # build a list of all tokens involved in this swapping path
-        self.tokens: List[Erc20Token] = []
-        for address in swap_token_addresses:
-            self.tokens.append(Erc20Token(address=address))
+        chain_id = self._w3.eth.chain_id
+
+        # build a list of all tokens involved in this swapping path, using the
+        # shared token manager so each token is only built once per process.
+        # The manager raises ManagerError if a token helper cannot be built.
+        token_manager = Erc20TokenHelperManager(chain_id)
+        self.tokens: List[Erc20Token] = [
+            token_manager.get_erc20token(address=address)
+            for address in swap_token_addresses
+        ]
 
         if name:
             self.name = name
         else:
             self.name = "-".join([token.symbol for token in self.tokens])
 
-        self.token_path = [token.address for token in self.tokens]
+        self.token_path = tuple(token.address for token in self.tokens)
 
         # build the list of intermediate pool pairs for the given multi-token path.
         # Pool list length will be 1 less than the token path length, e.g. a token1->token2->token3
         # path will result in a pool list consisting of token1/token2 and token2/token3
-        self.swap_pools = []
-        self.swap_pool_addresses = []
-
-        swap_factory_address = to_checksum_address(swap_factory_address)
+        swap_factory_address = get_checksum_address(swap_factory_address)
 
         self.swap_pools = get_v2_pools_from_token_path(
             tx_path=self.token_path,
             pool_manager=UniswapV2LiquidityPoolManager(
                 factory_address=swap_factory_address,
-                chain_id=self._w3.eth.chain_id,
+                chain_id=chain_id,
             ),
         )
         for pool in self.swap_pools:
             logger.info(f"Loaded LP: {pool}")
 
-        self.swap_pool_addresses = [pool.address for pool in self.swap_pools]
+        self.swap_pool_addresses = tuple(pool.address for pool in self.swap_pools)
+
+        # validate the path once, so the swap directions below are always valid
+        for pool, token_in, token_out in zip(self.swap_pools, self.tokens, self.tokens[1:]):
+            if (token_in, token_out) not in (
+                (pool.token0, pool.token1),
+                (pool.token1, pool.token0),
+            ):
+                raise ValueError(
+                    f"Pool {pool} does not swap {token_in} for {token_out}"
+                )
+
+        # pre-determine the swap direction through each pool along the path
+        self._pool_directions: Tuple[Tuple[LiquidityPool, bool], ...] = tuple(
+            (pool, token_in == pool.token0)
+            for pool, token_in in zip(self.swap_pools, self.tokens)
+        )
+
+        # bind the swap calculation for each pool in advance, so the bound
+        # methods are not rebuilt for every swap along the path
+        self._swap_steps: Tuple[Tuple[Callable[[bool, int], int], bool], ...] = tuple(
+            (pool.calculate_tokens_out_from_tokens_in_raw, zero_for_one)
+            for pool, zero_for_one in self._pool_directions
+        )
 
         self.borrow_pool = borrow_pool
         self.borrow_token = borrow_token
@@ -94,6 +159,10 @@ class FlashBorrowToRouterSwap(ArbitrageHelper):
         elif self.borrow_token == self.borrow_pool.token1:
             self.repay_token = self.borrow_pool.token0
 
+        # the repay token is swapped into the borrow pool, so the borrow pool
+        # direction is fixed for the lifetime of the helper
+        self._repay_zero_for_one: bool = self.repay_token == self.borrow_pool.token0
+
         self.best = {
             "init": True,
             "borrow": 0,
@@ -102,6 +171,31 @@ class FlashBorrowToRouterSwap(ArbitrageHelper):
             "profit_token": self.repay_token,
         }
 
+        # Reserves along the swap path packed in the direction of each swap,
+        # with the input reserves in row 0 and the output reserves in row 1.
+        # The borrow pool reserves are packed as (repay token, borrow token).
+        # Values are stored as floats, since reserves overflow 64-bit integers.
+        self._reserves = np.empty((2, len(self._pool_directions)))
+        self._borrow_reserves = np.empty(2)
+        self._fee_multipliers = np.array(
+            [
+                float(1 - (pool.fee_token0 if zero_for_one else pool.fee_token1))
+                for pool, zero_for_one in self._pool_directions
+            ]
+        )
+        self._borrow_fee_multiplier = float(
+            1
+            - (
+                self.borrow_pool.fee_token0
+                if self._repay_zero_for_one
+                else self.borrow_pool.fee_token1
+            )
+        )
+
+        # pool reserves and result of the last arbitrage calculation
+        self._last_state: Optional[Tuple[Tuple[int, int], ...]] = None
+        self._last_result: Dict[str, int] = {}
+
     def __str__(self):
         return self.name
 
@@ -122,17 +216,35 @@ class FlashBorrowToRouterSwap(ArbitrageHelper):
             self.best["init"] = False
             recalculate = True
 
-        # flag for recalculation if the borrowing pool has been updated
-        if self.borrow_pool.update_reserves(
-            silent=silent,
-            print_reserves=print_reserves,
-            print_ratios=print_ratios,
-        ):
-            recalculate = True
-
-        # flag for recalculation if any of the pools along the swap path have been updated
-        for pool in self.swap_pools:
-            if pool.update_reserves(
+        # flag for recalculation if the borrowing pool or any of the pools
+        # along the swap path have been updated
+        pools = [self.borrow_pool] + [
+            pool for pool in self.swap_pools if pool is not self.borrow_pool
+        ]
+        polled_pools = [pool for pool in pools if pool._update_method == "polling"]
+
+        update_block = self._w3.eth.get_block_number()
+        try:
+            polled_reserves = self._batch_fetch_reserves(polled_pools, update_block)
+        except (DecodingError, OSError, ValueError, Web3Exception) as e:
+            # RPC, connection and decoding errors from the multicall, so fall
+            # back to polling each pool individually
+            logger.debug(f"(FlashBorrowToRouterSwap) multicall failed: {e}")
+            polled_reserves = {}
+
+        for pool in pools:
+            if pool.address in polled_reserves:
+                reserves0, reserves1 = polled_reserves[pool.address]
+                if pool.apply_polled_reserves(
+                    reserves_token0=reserves0,
+                    reserves_token1=reserves1,
+                    update_block=update_block,
+                    silent=silent,
+                    print_reserves=print_reserves,
+                    print_ratios=print_ratios,
+                ):
+                    recalculate = True
+            elif pool.update_reserves(
                 silent=silent,
                 print_reserves=print_reserves,
                 print_ratios=print_ratios,
@@ -140,72 +252,296 @@ class FlashBorrowToRouterSwap(ArbitrageHelper):
                 recalculate = True
 
         if recalculate:
-            self._calculate_arbitrage()
+            if self._has_marginal_profit():
+                self._calculate_arbitrage()
+            else:
+                self.best.update(
+                    {
+                        "borrow": 0,
+                        "profit": 0,
+                        "swap_out": 0,
+                    }
+                )
             return True
         else:
             return False
 
-    def _calculate_arbitrage(self):
-        # set up the boundaries for the Brent optimizer based on which token is being borrowed
-        if self.borrow_token.address == self.borrow_pool.token0.address:
-            bounds = (
-                1,
-                float(self.borrow_pool.reserves_token0),
+    def _batch_fetch_reserves(
+        self,
+        pools: List[LiquidityPool],
+        block_number: int,
+    ) -> Dict[str, Tuple[int, int]]:
+        """
+        Fetches the reserves for all pools with a single Multicall3 call,
+        instead of issuing one `getReserves()` call per pool.
+
+        Returns a dictionary of (reserves0, reserves1) tuples, keyed by pool
+        address.
+        """
+
+        if not pools:
+            return {}
+
+        (_, return_data) = eth_abi.decode(
+            types=("uint256", "bytes[]"),
+            data=self._w3.eth.call(
+                {
+                    "to": MULTICALL3_ADDRESS,
+                    "data": _AGGREGATE_SELECTOR
+                    + eth_abi.encode(
+                        types=("(address,bytes)[]",),
+                        args=(
+                            [
+                                (pool.address, _GET_RESERVES_SELECTOR)
+                                for pool in pools
+                            ],
+                        ),
+                    ),
+                },
+                block_identifier=block_number,
+            ),
+        )
+
+        reserves: Dict[str, Tuple[int, int]] = {}
+        for pool, data in zip(pools, return_data):
+            reserves0, reserves1, _ = eth_abi.decode(
+                types=("uint112", "uint112", "uint32"),
+                data=data,
             )
-            bracket = (
-                0.01 * self.borrow_pool.reserves_token0,
-                0.05 * self.borrow_pool.reserves_token0,
+            reserves[pool.address] = (reserves0, reserves1)
+        return reserves
+
+    def _has_marginal_profit(self) -> bool:
+        """
+        Checks if borrowing an infinitesimal amount would be profitable.
+
+        The profit is concave in the borrow amount, so no arbitrage exists
+        unless the marginal swap rate along the path exceeds the marginal
+        repay rate of the borrow pool.
+        """
+
+        # an empty pool cannot be swapped through or borrowed from
+        for pool in (self.borrow_pool, *self.swap_pools):
+            if pool.reserves_token0 == 0 or pool.reserves_token1 == 0:
+                return False
+
+        marginal_rate = 1.0
+        for pool, zero_for_one in self._pool_directions:
+            if zero_for_one:
+                marginal_rate *= (
+                    float(1 - pool.fee_token0) * pool.reserves_token1 / pool.reserves_token0
+                )
+            else:
+                marginal_rate *= (
+                    float(1 - pool.fee_token1) * pool.reserves_token0 / pool.reserves_token1
+                )
+
+        if self._repay_zero_for_one:
+            marginal_repay_rate = self.borrow_pool.reserves_token0 / (
+                float(1 - self.borrow_pool.fee_token0) * self.borrow_pool.reserves_token1
             )
         else:
-            bounds = (
-                1,
-                float(self.borrow_pool.reserves_token1),
-            )
-            bracket = (
-                0.01 * self.borrow_pool.reserves_token1,
-                0.05 * self.borrow_pool.reserves_token1,
+            marginal_repay_rate = self.borrow_pool.reserves_token1 / (
+                float(1 - self.borrow_pool.fee_token1) * self.borrow_pool.reserves_token0
             )
 
-        opt = optimize.minimize_scalar(
-            lambda x: -float(
-                self.calculate_multipool_tokens_out_from_tokens_in(
+        return marginal_rate > marginal_repay_rate
+
+    def _calculate_arbitrage(self):
+        # the result depends only on the pool reserves, so reuse the last
+        # result if the reserves are unchanged since it was calculated
+        state = tuple(
+            (pool.reserves_token0, pool.reserves_token1)
+            for pool in (self.borrow_pool, *self.swap_pools)
+        )
+        if state == self._last_state:
+            self.best.update(self._last_result)
+            return
+
+        if len(self.swap_pools) == 1:
+            # a single swap pool has an analytic solution, so skip the optimizer
+            best_borrow = self._calculate_optimal_borrow_single_pool()
+            if best_borrow > 0:
+                swap_out = self.calculate_multipool_tokens_out_from_tokens_in(
                     token_in=self.borrow_token,
-                    token_in_quantity=x,
+                    token_in_quantity=best_borrow,
                 )
-                - self.borrow_pool.calculate_tokens_in_from_tokens_out(
+                best_profit = swap_out - self.borrow_pool.calculate_tokens_in_from_tokens_out(
                     token_in=self.repay_token,
-                    token_out_quantity=x,
+                    token_out_quantity=best_borrow,
                 )
-            ),
-            method="bounded",
-            bounds=bounds,
-            bracket=bracket,
+            else:
+                best_profit = swap_out = 0
+        else:
+            best_borrow, best_profit, swap_out = self._calculate_optimal_borrow_multi_pool()
+
+        # only save opportunities with rational, positive values
+        if best_borrow > 0 and best_profit > 0:
+            result = {
+                "borrow": best_borrow,
+                "profit": best_profit,
+                "swap_out": swap_out,
+            }
+        else:
+            result = {
+                "borrow": 0,
+                "profit": 0,
+                "swap_out": 0,
+            }
+
+        self.best.update(result)
+        self._last_state = state
+        self._last_result = result
+
+    def _calculate_optimal_borrow_single_pool(self) -> int:
+        """
+        Calculates the optimal borrow amount for a path with a single swap pool.
+
+        Borrowing from the borrow pool and swapping through the swap pool is
+        equivalent to a two-pool cycle that begins with the repay token, so the
+        optimal input is found where the marginal output of the cycle equals 1:
+
+        dy* = (sqrt(g1*g2*Ra*Rb*Rc*Rd) - Ra*Rc) / (g1*Rc + g1*g2*Rb)
+
+        where Ra/Rb are the repay/borrow token reserves of the borrow pool,
+        Rc/Rd are the borrow/repay token reserves of the swap pool, and g1/g2
+        are the fee multipliers (1 - fee) for each pool. The result is scaled
+        by the fee denominators so the calculation uses integer math only.
+
+        Returns the amount of borrow token to withdraw from the borrow pool,
+        or zero if no profitable arbitrage exists.
+        """
+
+        swap_pool = self.swap_pools[0]
+
+        if self._repay_zero_for_one:
+            reserves_a = self.borrow_pool.reserves_token0
+            reserves_b = self.borrow_pool.reserves_token1
+            fee_1 = self.borrow_pool.fee_token0
+        else:
+            reserves_a = self.borrow_pool.reserves_token1
+            reserves_b = self.borrow_pool.reserves_token0
+            fee_1 = self.borrow_pool.fee_token1
+
+        if self.borrow_token == swap_pool.token0:
+            reserves_c = swap_pool.reserves_token0
+            reserves_d = swap_pool.reserves_token1
+            fee_2 = swap_pool.fee_token0
+        else:
+            reserves_c = swap_pool.reserves_token1
+            reserves_d = swap_pool.reserves_token0
+            fee_2 = swap_pool.fee_token1
+
+        g1_num, g1_den = fee_1.denominator - fee_1.numerator, fee_1.denominator
+        g2_num, g2_den = fee_2.denominator - fee_2.numerator, fee_2.denominator
+
+        optimal_repay_input = (
+            isqrt(
+                g1_num * g2_num * g1_den * g2_den * reserves_a * reserves_b * reserves_c * reserves_d
+            )
+            - g1_den * g2_den * reserves_a * reserves_c
+        ) // (g1_num * g2_den * reserves_c + g1_num * g2_num * reserves_b)
+
+        if optimal_repay_input <= 0:
+            return 0
+
+        return self.borrow_pool.calculate_tokens_out_from_tokens_in(
+            token_in=self.repay_token,
+            token_in_quantity=optimal_repay_input,
         )
 
-        best_borrow = opt.x
-        best_profit = -opt.fun
-        swap_out = self.calculate_multipool_tokens_out_from_tokens_in(
-            token_in=self.borrow_token,
-            token_in_quantity=best_borrow,
+    def _calculate_optimal_borrow_multi_pool(self):
+        repay_zero_for_one = self._repay_zero_for_one
+
+        self._sync_reserves()
+        reserves_in, reserves_out = self._reserves
+        borrow_reserves_in, borrow_reserves_out = self._borrow_reserves
+
+        # the borrowed amount is bounded by the borrow token reserves
+        bounds = (1, borrow_reserves_out)
+
+        # the optimizer returns its best evaluated point, so record the exact
+        # amounts for each evaluation to avoid repeating the final swap
+        evaluations: Dict[int, Tuple[int, int]] = {}
+
+        objective_args = (
+            self._swap_steps,
+            self.borrow_pool.calculate_tokens_in_from_tokens_out_raw,
+            repay_zero_for_one,
+            evaluations,
         )
 
-        # only save opportunities with rational, positive values
-        if best_borrow > 0 and best_profit > 0:
-            self.best.update(
-                {
-                    "borrow": best_borrow,
-                    "profit": best_profit,
-                    "swap_out": swap_out,
-                }
+        # The profit is concave in the borrow amount, so evaluate it over a
+        # coarse grid in a single vectorized pass and use the best grid point
+        # to bracket the optimum. The grid is geometric because the optimum
+        # is usually several orders of magnitude below the pool reserves.
+        grid = np.geomspace(bounds[0], bounds[1], 64, endpoint=False)
+        grid_swap_out = grid
+        for i in range(len(reserves_in)):
+            amount_in_with_fee = grid_swap_out * self._fee_multipliers[i]
+            grid_swap_out = (
+                amount_in_with_fee * reserves_out[i] / (reserves_in[i] + amount_in_with_fee)
             )
-        else:
-            self.best.update(
-                {
-                    "borrow": 0,
-                    "profit": 0,
-                    "swap_out": 0,
-                }
+        grid_profit = grid_swap_out - borrow_reserves_in * grid / (
+            (borrow_reserves_out - grid) * self._borrow_fee_multiplier
+        )
+        best_index = int(np.argmax(grid_profit))
+
+        if grid_profit[best_index] <= 0:
+            return 0, 0, 0
+
+        try:
+            if not 0 < best_index < len(grid) - 1:
+                raise ValueError("Optimum is not bracketed by the grid")
+            opt = optimize.minimize_scalar(
+                _negative_profit,
+                args=objective_args,
+                method="brent",
+                bracket=(
+                    grid[best_index - 1],
+                    grid[best_index],
+                    grid[best_index + 1],
+                ),
             )
+        except ValueError:
+            # the integer objective may not satisfy the bracket conditions
+            # of the floating point grid, so search the full bounds instead
+            optimum, _ = brent_bounded(
+                lambda x: _negative_profit(x, *objective_args),
+                *bounds,
+            )
+        else:
+            optimum = opt.x
+
+        best_borrow = int(optimum)
+        try:
+            best_profit, swap_out = evaluations[best_borrow]
+        except KeyError:
+            _negative_profit(best_borrow, *objective_args)
+            best_profit, swap_out = evaluations[best_borrow]
+
+        return best_borrow, best_profit, swap_out
+
+    def _sync_reserves(self) -> None:
+        """
+        Copies the current pool reserves into the packed arrays read by the
+        vectorized profit grid.
+        """
+
+        for i, (pool, zero_for_one) in enumerate(self._pool_directions):
+            if zero_for_one:
+                self._reserves[0, i] = pool.reserves_token0
+                self._reserves[1, i] = pool.reserves_token1
+            else:
+                self._reserves[0, i] = pool.reserves_token1
+                self._reserves[1, i] = pool.reserves_token0
+
+        if self._repay_zero_for_one:
+            self._borrow_reserves[0] = self.borrow_pool.reserves_token0
+            self._borrow_reserves[1] = self.borrow_pool.reserves_token1
+        else:
+            self._borrow_reserves[0] = self.borrow_pool.reserves_token1
+            self._borrow_reserves[1] = self.borrow_pool.reserves_token0
 
     def calculate_multipool_tokens_out_from_tokens_in(
         self,
@@ -214,35 +550,16 @@ class FlashBorrowToRouterSwap(ArbitrageHelper):
     ) -> int:
         """
         Calculates the expected token OUTPUT from the last pool for a given token INPUT to the first pool at current pool reserves.
-        Uses the self.token0 and self.token1 pointers to determine which token is being swapped in
-        and uses the appropriate formula
+        The swap direction through each pool is pre-determined at construction, so `token_in` must be the first token in the path.
         """
 
-        number_of_pools = len(self.swap_pools)
-
-        for i in range(number_of_pools):
-            # determine the output token for pool0
-            if token_in.address == self.swap_pools[i].token0.address:
-                token_out = self.swap_pools[i].token1
-            elif token_in.address == self.swap_pools[i].token1.address:
-                token_out = self.swap_pools[i].token0
-            else:
-                print("wtf?")
-                raise Exception
-
-            # calculate the swap output through pool[i]
-            token_out_quantity = self.swap_pools[
-                i
-            ].calculate_tokens_out_from_tokens_in(
-                token_in=token_in,
-                token_in_quantity=token_in_quantity,
+        if token_in != self.tokens[0]:
+            raise ValueError(
+                f"Swap path begins with {self.tokens[0]}, not {token_in}"
             )
 
-            if i == number_of_pools - 1:
-                break
-            else:
-                # otherwise, use the output as input on the next loop
-                token_in = token_out
-                token_in_quantity = token_out_quantity
+        token_out_quantity = token_in_quantity
+        for calculate_swap, zero_for_one in self._swap_steps:
+            token_out_quantity = calculate_swap(zero_for_one, token_out_quantity)
 
         return token_out_quantity
@@ -0,0 +1,111 @@
+from math import sqrt
+from typing import Callable, Tuple
+
+_SQRT_EPS = sqrt(2.2e-16)
+_GOLDEN_MEAN = 0.5 * (3.0 - sqrt(5.0))
+
+
+def _sign(value: float) -> float:
+    # returns 1.0 for zero, matching np.sign(value) + (value == 0)
+    return -1.0 if value < 0 else 1.0
+
+
+def brent_bounded(
+    func: Callable[[float], float],
+    lower: float,
+    upper: float,
+    xatol: float = 1e-5,
+    maxiter: int = 500,
+) -> Tuple[float, float]:
+    """
+    Find the minimum of a scalar function inside the interval (lower, upper)
+    using Brent's method with a golden-section fallback.
+
+    A direct port of `scipy.optimize.minimize_scalar(method="bounded")`,
+    which returns identical results without the option parsing, result
+    object construction, and numpy scalar operations for each iteration.
+
+    Returns a tuple of the input at the minimum and the function value at
+    that input.
+    """
+
+    if lower > upper:
+        raise ValueError("The lower bound exceeds the upper bound.")
+
+    a, b = lower, upper
+    fulc = a + _GOLDEN_MEAN * (b - a)
+    nfc, xf = fulc, fulc
+    rat = e = 0.0
+    x = xf
+    fx = func(x)
+    num = 1
+
+    ffulc = fnfc = fx
+    xm = 0.5 * (a + b)
+    tol1 = _SQRT_EPS * abs(xf) + xatol / 3.0
+    tol2 = 2.0 * tol1
+
+    while abs(xf - xm) > (tol2 - 0.5 * (b - a)):
+        golden = True
+
+        # check for parabolic fit
+        if abs(e) > tol1:
+            golden = False
+            r = (xf - nfc) * (fx - ffulc)
+            q = (xf - fulc) * (fx - fnfc)
+            p = (xf - fulc) * q - (xf - nfc) * r
+            q = 2.0 * (q - r)
+            if q > 0.0:
+                p = -p
+            q = abs(q)
+            r = e
+            e = rat
+
+            # check for acceptability of parabola
+            if (abs(p) < abs(0.5 * q * r)) and (p > q * (a - xf)) and (p < q * (b - xf)):
+                rat = (p + 0.0) / q
+                x = xf + rat
+                if ((x - a) < tol2) or ((b - x) < tol2):
+                    rat = tol1 * _sign(xm - xf)
+            else:
+                golden = True
+
+        # do a golden-section step
+        if golden:
+            if xf >= xm:
+                e = a - xf
+            else:
+                e = b - xf
+            rat = _GOLDEN_MEAN * e
+
+        x = xf + _sign(rat) * max(abs(rat), tol1)
+        fu = func(x)
+        num += 1
+
+        if fu <= fx:
+            if x >= xf:
+                a = xf
+            else:
+                b = xf
+            fulc, ffulc = nfc, fnfc
+            nfc, fnfc = xf, fx
+            xf, fx = x, fu
+        else:
+            if x < xf:
+                a = x
+            else:
+                b = x
+            if (fu <= fnfc) or (nfc == xf):
+                fulc, ffulc = nfc, fnfc
+                nfc, fnfc = x, fu
+            elif (fu <= ffulc) or (fulc == xf) or (fulc == nfc):
+                fulc, ffulc = x, fu
+
+        xm = 0.5 * (a + b)
+        tol1 = _SQRT_EPS * abs(xf) + xatol / 3.0
+        tol2 = 2.0 * tol1
+
+        if num >= maxiter:
+            break
+
+    return xf, fx
@@ -1,8 +1,12 @@
 import asyncio
-from fractions import Fraction
+import os
+from functools import lru_cache
+from math import sqrt
 from threading import Lock
 from typing import (
     TYPE_CHECKING,
+    Any,
+    Callable,
     Dict,
     Iterable,
     List,
@@ -16,15 +20,13 @@ from warnings import warn
 if TYPE_CHECKING:
     from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-import eth_abi
 from eth_typing import ChecksumAddress
-from eth_utils.address import to_checksum_address
-from scipy.optimize import minimize_scalar  # type: ignore[import]
 from web3 import Web3
 
 from ..baseclasses import ArbitrageHelper
 from ..erc20_token import Erc20Token
 from ..exceptions import ArbitrageError, EVMRevertError, LiquidityPoolError, ZeroLiquidityError
+from ..functions import get_checksum_address
 from ..logging import logger
 from ..uniswap.mixins import Publisher, Subscriber
 from ..uniswap.v2_dataclasses import UniswapV2PoolSimulationResult, UniswapV2PoolState
@@ -38,12 +40,157 @@ from .arbitrage_dataclasses import (
     UniswapV2PoolSwapAmounts,
     UniswapV3PoolSwapAmounts,
 )
+from .solver import brent_bounded
+
+# Function selectors for the calls built by `generate_payloads`
+_TRANSFER_SELECTOR = Web3.keccak(text="transfer(address,uint256)")[:4]
+_V2_SWAP_SELECTOR = Web3.keccak(text="swap(uint256,uint256,address,bytes)")[:4]
+_V3_SWAP_SELECTOR = Web3.keccak(text="swap(address,bool,int256,uint160,bytes)")[:4]
+
+# ABI encoding of an empty `bytes` argument following a fixed-size head of
+# N words: the offset to the data (N * 32) and a zero length
+_V2_SWAP_EMPTY_DATA = (4 * 32).to_bytes(32, "big") + bytes(32)
+_V3_SWAP_EMPTY_DATA = (5 * 32).to_bytes(32, "big") + bytes(32)
+
+
+@lru_cache(maxsize=4096)
+def _encode_address(address: str) -> bytes:
+    # Pool, token and executor addresses are encoded repeatedly, so the
+    # results are cached
+    address_bytes = bytes.fromhex(address[2:])
+    if len(address_bytes) != 20:
+        raise ValueError(f"Invalid address {address}")
+    return bytes(12) + address_bytes
+
+
+def _encode_uint(value: int, bits: int = 256) -> bytes:
+    if not 0 <= value < 2**bits:
+        raise ValueError(f"Value {value} cannot be encoded as uint{bits}")
+    return value.to_bytes(32, "big")
+
+
+def _encode_v2_swap_payload(swap_amounts: UniswapV2PoolSwapAmounts, to: str) -> bytes:
+    return _encode_v2_swap_calldata(*swap_amounts.amounts, to)
+
+
+def _encode_v3_swap_payload(swap_amounts: UniswapV3PoolSwapAmounts, recipient: str) -> bytes:
+    return _encode_v3_swap_calldata(
+        recipient,
+        swap_amounts.zero_for_one,
+        swap_amounts.amount_specified,
+        swap_amounts.sqrt_price_limit_x96,
+    )
+
+
+def _encode_v2_swap_calldata(amount0_out: int, amount1_out: int, to: str) -> bytes:
+    """
+    Encode the calldata for a V2 `swap(uint256,uint256,address,bytes)` with
+    empty callback data, identical to the selector + `eth_abi.encode` result.
+    """
+    return b"".join(
+        (
+            _V2_SWAP_SELECTOR,
+            _encode_uint(amount0_out),
+            _encode_uint(amount1_out),
+            _encode_address(to),
+            _V2_SWAP_EMPTY_DATA,
+        )
+    )
+
+
+def _encode_v3_swap_calldata(
+    recipient: str,
+    zero_for_one: bool,
+    amount_specified: int,
+    sqrt_price_limit_x96: int,
+) -> bytes:
+    """
+    Encode the calldata for a V3 `swap(address,bool,int256,uint160,bytes)`
+    with empty callback data, identical to the selector + `eth_abi.encode`
+    result.
+    """
+    if not -(2**255) <= amount_specified < 2**255:
+        raise ValueError(f"Value {amount_specified} cannot be encoded as int256")
+    return b"".join(
+        (
+            _V3_SWAP_SELECTOR,
+            _encode_address(recipient),
+            _encode_uint(1 if zero_for_one else 0),
+            amount_specified.to_bytes(32, "big", signed=True),
+            _encode_uint(sqrt_price_limit_x96, bits=160),
+            _V3_SWAP_EMPTY_DATA,
+        )
+    )
+
+
+# Price limits for a V3 swap that should not stop at an intermediate price
+_V3_MIN_SQRT_PRICE_LIMIT = TickMath.MIN_SQRT_RATIO + 1
+_V3_MAX_SQRT_PRICE_LIMIT = TickMath.MAX_SQRT_RATIO - 1
+
+
+def _v2_swap_amounts(
+    token_in_quantity: int,
+    token_out_quantity: int,
+    zero_for_one: bool,
+) -> UniswapV2PoolSwapAmounts:
+    return UniswapV2PoolSwapAmounts(
+        amounts=(0, token_out_quantity) if zero_for_one else (token_out_quantity, 0),
+    )
+
+
+def _v3_swap_amounts(
+    token_in_quantity: int,
+    token_out_quantity: int,
+    zero_for_one: bool,
+) -> UniswapV3PoolSwapAmounts:
+    return UniswapV3PoolSwapAmounts(
+        amount_specified=token_in_quantity,
+        zero_for_one=zero_for_one,
+        sqrt_price_limit_x96=_V3_MIN_SQRT_PRICE_LIMIT if zero_for_one else _V3_MAX_SQRT_PRICE_LIMIT,
+    )
+
+
+def _calculate_cycles(
+    cycles: Sequence["UniswapLpCycle"],
+    override_state: Optional[
+        Sequence[
+            Union[
+                Tuple[LiquidityPool, UniswapV2PoolState],
+                Tuple[LiquidityPool, UniswapV2PoolSimulationResult],
+                Tuple[V3LiquidityPool, UniswapV3PoolState],
+                Tuple[V3LiquidityPool, UniswapV3PoolSimulationResult],
+            ]
+        ]
+    ],
+) -> List[Union[ArbitrageCalculationResult, ArbitrageError]]:
+    """
+    Calculate a group of cycles inside a worker, returning arbitrage errors
+    in place of the result instead of raising them. Other exceptions are
+    raised, and fail the whole group.
+    """
+
+    results: List[Union[ArbitrageCalculationResult, ArbitrageError]] = []
+    for cycle in cycles:
+        try:
+            results.append(cycle.calculate(override_state))
+        except ArbitrageError as e:
+            results.append(e)
+    return results
 
 
 class UniswapLpCycle(Subscriber, ArbitrageHelper):
     __slots__ = (
+        "_fee_multiplier_ratios",
+        "_fee_multipliers",
         "_lock",
+        "_payload_steps",
+        "_payload_transfer",
+        "_pool_indices",
+        "_pool_states",
+        "_pre_check_states",
+        "_swap_amounts_builders",
         "_swap_vectors",
+        "_unset_pool_state_count",
         "best",
         "id",
         "input_token",
@@ -54,6 +201,12 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         "swap_pools",
     )
 
+    # Attributes copied by `__getstate__`. Objects that cannot be pickled and
+    # are unnecessary to perform the calculation are removed.
+    _PICKLE_SLOTS = tuple(
+        attr_name for attr_name in __slots__ if attr_name not in ("_lock", "_subscribers")
+    )
+
     def __init__(
         self,
         input_token: Erc20Token,
@@ -63,13 +216,14 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
     ):
         self._lock = Lock()
 
-        if any([not isinstance(pool, (LiquidityPool, V3LiquidityPool)) for pool in swap_pools]):
+        self.swap_pools = tuple(swap_pools)
+
+        if any(not isinstance(pool, (LiquidityPool, V3LiquidityPool)) for pool in self.swap_pools):
             raise ValueError("Must provide only Uniswap liquidity pools.")
 
-        self.swap_pools = tuple(swap_pools)
         self.name = "→".join([pool.name for pool in self.swap_pools])
 
-        for pool in swap_pools:
+        for pool in self.swap_pools:
             pool.subscribe(self)
 
         self.id = id
@@ -88,15 +242,17 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         # ]
 
         # Set up pre-determined "swap vectors", which allows the helper
-        # to identify the tokens and direction of each swap along the path
+        # to identify the tokens and direction of each swap along the path.
+        # Tokens are usually shared objects from the token manager, so check
+        # identity before falling back to the address comparison in __eq__
         _swap_vectors: List[UniswapPoolSwapVector] = []
         for i, pool in enumerate(self.swap_pools):
             if i == 0:
-                if self.input_token == pool.token0:
+                if self.input_token is pool.token0 or self.input_token == pool.token0:
                     token_in = pool.token0
                     token_out = pool.token1
                     zero_for_one = True
-                elif self.input_token == pool.token1:
+                elif self.input_token is pool.token1 or self.input_token == pool.token1:
                     token_in = pool.token1
                     token_out = pool.token0
                     zero_for_one = False
@@ -104,11 +260,11 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                     raise ValueError("Input token could not be identified!")
             else:
                 # token_out references the output from the previous pool
-                if token_out == pool.token0:
+                if token_out is pool.token0 or token_out == pool.token0:
                     token_in = pool.token0
                     token_out = pool.token1
                     zero_for_one = True
-                elif token_out == pool.token1:
+                elif token_out is pool.token1 or token_out == pool.token1:
                     token_in = pool.token1
                     token_out = pool.token0
                     zero_for_one = False
@@ -123,6 +279,91 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
             )
         self._swap_vectors = tuple(_swap_vectors)
 
+        # Select the function that builds the swap amounts for each pool type.
+        # Module-level functions are used so the helper can still be pickled.
+        self._swap_amounts_builders: Tuple[
+            Callable[
+                [int, int, bool],
+                Union[UniswapV2PoolSwapAmounts, UniswapV3PoolSwapAmounts],
+            ],
+            ...,
+        ] = tuple(
+            _v2_swap_amounts if isinstance(pool, LiquidityPool) else _v3_swap_amounts
+            for pool in self.swap_pools
+        )
+
+        # Pre-determine the pool address, calldata encoder, and swap
+        # destination for each pool in the payload. A destination of None is
+        # replaced by the executing address when the payload is generated.
+        _payload_steps: List[
+            Tuple[ChecksumAddress, Callable[[Any, str], bytes], Optional[ChecksumAddress]]
+        ] = []
+        for pool, next_pool in zip(self.swap_pools, self.swap_pools[1:] + (None,)):
+            swap_destination_address: Optional[ChecksumAddress]
+            if isinstance(next_pool, LiquidityPool):
+                # V2 pools require a pre-swap transfer, so the contract
+                # does not have to perform intermediate custody and the
+                # swap can send the tokens directly to the next pool
+                swap_destination_address = next_pool.address
+            else:
+                # V3 pools cannot accept a pre-swap transfer, so the contract
+                # must maintain custody prior to a swap. The last swap sends
+                # its output to the executing address.
+                swap_destination_address = None
+            _payload_steps.append(
+                (
+                    pool.address,
+                    _encode_v2_swap_payload
+                    if isinstance(pool, LiquidityPool)
+                    else _encode_v3_swap_payload,
+                    swap_destination_address,
+                )
+            )
+        self._payload_steps = tuple(_payload_steps)
+
+        # If the first pool is type V2, the input token must be transferred
+        # prior to the swap. Only the amount changes between calls, so the
+        # token address, selector, and encoded pool address are prepared once.
+        self._payload_transfer: Optional[Tuple[ChecksumAddress, bytes]] = (
+            (
+                self.input_token.address,
+                _TRANSFER_SELECTOR + _encode_address(self.swap_pools[0].address),
+            )
+            if isinstance(self.swap_pools[0], LiquidityPool)
+            else None
+        )
+
+        # Pre-calculate the fee multiplier (1 - fee) in the direction of each
+        # swap as an integer (numerator, denominator) pair, used to check the
+        # profitability of the path
+        _fee_multiplier_ratios: List[Tuple[int, int]] = []
+        for pool, vector in zip(self.swap_pools, self._swap_vectors):
+            if isinstance(pool, LiquidityPool):
+                # V2 fee is 0.3% by default, represented by 3/1000 = Fraction(3,1000)
+                fee = pool.fee_token0 if vector.zero_for_one else pool.fee_token1
+                _fee_multiplier_ratios.append((fee.denominator - fee.numerator, fee.denominator))
+            else:
+                # V3 fees are integer values representing hundredths of a bip (0.0001)
+                # e.g. fee=3000 represents 0.3%
+                _fee_multiplier_ratios.append((1_000_000 - pool._fee, 1_000_000))
+        self._fee_multiplier_ratios = tuple(_fee_multiplier_ratios)
+        self._fee_multipliers = tuple(
+            numerator / denominator for numerator, denominator in self._fee_multiplier_ratios
+        )
+
+        # The pool states at the last successful pre-calculation check
+        self._pre_check_states: Optional[
+            Tuple[Union[UniswapV2PoolState, UniswapV3PoolState], ...]
+        ] = None
+
+        # The positions of each pool along the path, used to align pool
+        # states and overrides with the swap order. Keyed by address, since
+        # the pool objects are replaced when the helper is pickled.
+        self._pool_indices: Dict[ChecksumAddress, List[int]] = {}
+        for i, pool in enumerate(self.swap_pools):
+            self._pool_indices.setdefault(pool.address, []).append(i)
+
+        # The last known state of each pool, keyed by address
         self.pool_states: Dict[
             ChecksumAddress,
             Optional[
@@ -132,6 +373,17 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                 ]
             ],
         ] = {pool.address: None for pool in self.swap_pools}
+        # The same states in swap order
+        self._pool_states: List[
+            Optional[
+                Union[
+                    UniswapV2PoolState,
+                    UniswapV3PoolState,
+                ]
+            ]
+        ] = [None] * len(self.swap_pools)
+        # The number of positions in `self._pool_states` without a state
+        self._unset_pool_state_count = len(self.swap_pools)
 
         self.best: dict = {
             "input_token": self.input_token,
@@ -147,26 +399,8 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         }
 
     def __getstate__(self) -> dict:
-        # Remove objects that cannot be pickled and are unnecessary to perform
-        # the calculation
-        dropped_attributes = (
-            "_lock",
-            "_subscribers",
-        )
-
         with self._lock:
-            if hasattr(self, "__slots__"):
-                return {
-                    attr_name: getattr(self, attr_name, None)
-                    for attr_name in self.__slots__
-                    if attr_name not in dropped_attributes
-                }
-            else:
-                return {
-                    attr_name: attr_value
-                    for attr_name, attr_value in self.__dict__.items()
-                    if attr_name not in dropped_attributes
-                }
+            return {attr_name: getattr(self, attr_name, None) for attr_name in self._PICKLE_SLOTS}
 
     def __setstate__(self, state: dict):
         for attr_name, attr_value in state.items():
@@ -187,16 +421,19 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                 ]
             ]
         ],
-    ) -> Dict[ChecksumAddress, Union[UniswapV2PoolState, UniswapV3PoolState]]:
+    ) -> List[Optional[Union[UniswapV2PoolState, UniswapV3PoolState]]]:
         """
         Validate the overrides, extract and insert the resulting pool states
-        into a dictionary.
+        into a list aligned with `self.swap_pools`. Pools without an override
+        are represented by `None`.
         """
 
-        if overrides is None:
-            return {}
+        sorted_overrides: List[Optional[Union[UniswapV2PoolState, UniswapV3PoolState]]] = [
+            None
+        ] * len(self.swap_pools)
 
-        sorted_overrides: Dict[ChecksumAddress, Union[UniswapV2PoolState, UniswapV3PoolState]] = {}
+        if overrides is None:
+            return sorted_overrides
 
         for pool, override in overrides:
             if isinstance(
@@ -206,8 +443,8 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                     UniswapV3PoolState,
                 ),
             ):
-                logger.debug(f"Applying override {override} to {pool}")
-                sorted_overrides[pool.address] = override
+                logger.debug("Applying override %s to %s", override, pool)
+                pool_state = override
             elif isinstance(
                 override,
                 (
@@ -215,11 +452,14 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                     UniswapV3PoolSimulationResult,
                 ),
             ):
-                logger.debug(f"Applying override {override.future_state} to {pool}")
-                sorted_overrides[pool.address] = override.future_state
+                logger.debug("Applying override %s to %s", override.future_state, pool)
+                pool_state = override.future_state
             else:
                 raise ValueError(f"Override for {pool} has unsupported type {type(override)}")
 
+            for i in self._pool_indices.get(pool.address, ()):
+                sorted_overrides[i] = pool_state
+
         return sorted_overrides
 
     def _build_amounts_out(
@@ -227,7 +467,7 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         token_in: Erc20Token,
         token_in_quantity: int,
         pool_state_overrides: Optional[
-            Dict[ChecksumAddress, Union[UniswapV2PoolState, UniswapV3PoolState]]
+            List[Optional[Union[UniswapV2PoolState, UniswapV3PoolState]]]
         ] = None,
     ) -> List[Union[UniswapV2PoolSwapAmounts, UniswapV3PoolSwapAmounts]]:
         """
@@ -236,14 +476,21 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         """
 
         if pool_state_overrides is None:
-            pool_state_overrides = {}
+            pool_state_overrides = [None] * len(self.swap_pools)
 
         pools_amounts_out: List[Union[UniswapV2PoolSwapAmounts, UniswapV3PoolSwapAmounts]] = []
 
         _token_in_quantity: int = 0
         _token_out_quantity: int = 0
 
-        for i, (pool, swap_vector) in enumerate(zip(self.swap_pools, self._swap_vectors)):
+        for i, (pool, swap_vector, build_swap_amounts, pool_state_override) in enumerate(
+            zip(
+                self.swap_pools,
+                self._swap_vectors,
+                self._swap_amounts_builders,
+                pool_state_overrides,
+            )
+        ):
             token_in = swap_vector.token_in
             zero_for_one = swap_vector.zero_for_one
 
@@ -253,60 +500,20 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                 _token_in_quantity = _token_out_quantity
 
             try:
-                if isinstance(pool, LiquidityPool):
-                    pool_state_override = pool_state_overrides.get(pool.address)
-                    if TYPE_CHECKING:
-                        assert pool_state_override is None or isinstance(
-                            pool_state_override,
-                            UniswapV2PoolState,
-                        )
-                    _token_out_quantity = pool.calculate_tokens_out_from_tokens_in(
-                        token_in=token_in,
-                        token_in_quantity=_token_in_quantity,
-                        override_state=pool_state_override,
-                    )
-                elif isinstance(pool, V3LiquidityPool):
-                    pool_state_override = pool_state_overrides.get(pool.address)
-                    if TYPE_CHECKING:
-                        assert pool_state_override is None or isinstance(
-                            pool_state_override,
-                            UniswapV3PoolState,
-                        )
-                    _token_out_quantity = pool.calculate_tokens_out_from_tokens_in(
-                        token_in=token_in,
-                        token_in_quantity=_token_in_quantity,
-                        override_state=pool_state_override,
-                    )
-                else:
-                    raise ValueError(f"Could not determine Uniswap version for pool {pool}")
+                _token_out_quantity = pool.calculate_tokens_out_from_tokens_in(
+                    token_in=token_in,
+                    token_in_quantity=_token_in_quantity,
+                    override_state=pool_state_override,  # type: ignore[arg-type]
+                )
             except LiquidityPoolError as e:
                 raise ArbitrageError(f"(calculate_tokens_out_from_tokens_in): {e}")
             else:
                 if _token_out_quantity == 0:
                     raise ArbitrageError(f"Zero-output swap through pool {pool} @ {pool.address}")
 
-            if isinstance(pool, LiquidityPool):
-                pools_amounts_out.append(
-                    UniswapV2PoolSwapAmounts(
-                        amounts=(0, _token_out_quantity)
-                        if zero_for_one
-                        else (_token_out_quantity, 0),
-                    )
-                )
-            elif isinstance(pool, V3LiquidityPool):
-                pools_amounts_out.append(
-                    UniswapV3PoolSwapAmounts(
-                        amount_specified=_token_in_quantity,
-                        zero_for_one=zero_for_one,
-                        sqrt_price_limit_x96=TickMath.MIN_SQRT_RATIO + 1
-                        if zero_for_one
-                        else TickMath.MAX_SQRT_RATIO - 1,
-                    )
-                )
-            else:
-                raise ValueError(
-                    f"Could not identify Uniswap version for pool: {self.swap_pools[i]}"
-                )
+            pools_amounts_out.append(
+                build_swap_amounts(_token_in_quantity, _token_out_quantity, zero_for_one)
+            )
 
         return pools_amounts_out
 
@@ -314,7 +521,15 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         """
         Update `self.pool_states` with state values from the `pools` iterable
         """
-        self.pool_states.update({pool.address: pool.state for pool in pools})
+        for pool in pools:
+            self.pool_states[pool.address] = pool.state
+            for i in self._pool_indices[pool.address]:
+                if self._pool_states[i] is None:
+                    self._unset_pool_state_count -= 1
+                self._pool_states[i] = pool.state
+                if pool.state is None:
+                    self._unset_pool_state_count += 1
+        self._pre_check_states = None
 
     def auto_update(
         self,
@@ -328,7 +543,7 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
 
         found_updates = False
 
-        if None in self.pool_states.values():
+        if self._unset_pool_state_count:
             found_updates = True
             self._update_pool_states(self.swap_pools)
             self.clear_best()
@@ -338,7 +553,7 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         if override_update_method:
             logger.debug(f"OVERRIDDEN UPDATE METHOD: {override_update_method}")
 
-        for pool in self.swap_pools:
+        for i, pool in enumerate(self.swap_pools):
             pool_updated = False
             if isinstance(pool, LiquidityPool):
                 if pool._update_method == "polling" or override_update_method == "polling":
@@ -348,7 +563,7 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                         update_block=block_number,
                     )
                 elif pool._update_method == "external":
-                    if pool.state != self.pool_states[pool.address]:
+                    if pool.state != self._pool_states[i]:
                         logger.debug(f"(UniswapLpCycle) found update for pool {pool}")
                         pool_updated = True
 
@@ -379,27 +594,34 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
 
     def _pre_calculation_check(
         self,
-        override_state: Optional[
-            Sequence[
-                Union[
-                    Tuple[LiquidityPool, UniswapV2PoolState],
-                    Tuple[LiquidityPool, UniswapV2PoolSimulationResult],
-                    Tuple[V3LiquidityPool, UniswapV3PoolState],
-                    Tuple[V3LiquidityPool, UniswapV3PoolSimulationResult],
-                ]
-            ]
-        ] = None,
+        state_overrides: List[Optional[Union[UniswapV2PoolState, UniswapV3PoolState]]],
     ):
-        state_overrides = self._sort_overrides(override_state)
+        # Pool states are replaced on every update, so the check can be
+        # skipped if the same state objects passed at the last check
+        no_overrides = all(pool_override is None for pool_override in state_overrides)
+        if no_overrides:
+            current_states = tuple(pool.state for pool in self.swap_pools)
+            if self._pre_check_states is not None and all(
+                current is previous
+                for current, previous in zip(current_states, self._pre_check_states)
+            ):
+                return
 
-        # A scalar value representing the net amount of 1 input token across
-        # the complete path (excluding fees).
+        # A ratio representing the net amount of 1 input token across the
+        # complete path (including fees), held as an exact integer numerator
+        # and denominator so a marginal path is not rejected by float error.
         # e.g. profit_factor > 1.0 indicates a profitable trade.
-        profit_factor: float = 1.0
+        profit_factor_numerator = 1
+        profit_factor_denominator = 1
 
         # Check the pool state liquidity in the direction of the trade
-        for pool, vector in zip(self.swap_pools, self._swap_vectors):
-            pool_state = state_overrides.get(pool.address) or pool.state
+        for pool, vector, (fee_numerator, fee_denominator), pool_override in zip(
+            self.swap_pools,
+            self._swap_vectors,
+            self._fee_multiplier_ratios,
+            state_overrides,
+        ):
+            pool_state = pool_override or pool.state
 
             if isinstance(pool, LiquidityPool):
                 if TYPE_CHECKING:
@@ -417,7 +639,8 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                         f"V2 pool {pool.address} has no liquidity for a 1 -> 0 swap"
                     )
 
-                price = pool_state.reserves_token1 / pool_state.reserves_token0
+                price_numerator = pool_state.reserves_token1
+                price_denominator = pool_state.reserves_token0
 
             elif isinstance(pool, V3LiquidityPool):
                 if TYPE_CHECKING:
@@ -453,41 +676,28 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                             f"V3 pool {pool.address} has no liquidity for a 1 -> 0 swap"
                         )
 
-                price = pool_state.sqrt_price_x96**2 / (2**192)
+                price_numerator = pool_state.sqrt_price_x96**2
+                price_denominator = 2**192
 
-            if isinstance(pool, LiquidityPool):
-                # V2 fee is 0.3% by default, represented by 3/1000 = Fraction(3,1000)
-                fee = pool.fee_token0 if vector.zero_for_one else pool.fee_token1
-            else:
-                # V3 fees are integer values representing hundredths of a bip (0.0001)
-                # e.g. fee=3000 represents 0.3%
-                fee = Fraction(pool._fee, 1000000)
+            if not vector.zero_for_one:
+                price_numerator, price_denominator = price_denominator, price_numerator
 
-            profit_factor *= (price if vector.zero_for_one else 1 / price) * (
-                (fee.denominator - fee.numerator) / fee.denominator
-            )
+            profit_factor_numerator *= price_numerator * fee_numerator
+            profit_factor_denominator *= price_denominator * fee_denominator
 
-        if profit_factor < 1.0:
+        if profit_factor_numerator < profit_factor_denominator:
             raise ArbitrageError(
-                f"No profitable arbitrage at current prices. Profit factor: {profit_factor}"
+                "No profitable arbitrage at current prices. "
+                f"Profit factor: {profit_factor_numerator / profit_factor_denominator}"
             )
 
-    def _calculate(
+        if no_overrides:
+            self._pre_check_states = current_states
+
+    def _calculate_sorted(
         self,
-        override_state: Optional[
-            Sequence[
-                Union[
-                    Tuple[LiquidityPool, UniswapV2PoolState],
-                    Tuple[LiquidityPool, UniswapV2PoolSimulationResult],
-                    Tuple[V3LiquidityPool, UniswapV3PoolState],
-                    Tuple[V3LiquidityPool, UniswapV3PoolSimulationResult],
-                ]
-            ]
-        ] = None,
+        state_overrides: List[Optional[Union[UniswapV2PoolState, UniswapV3PoolState]]],
     ) -> ArbitrageCalculationResult:
-        self._pre_calculation_check(override_state)
-
-        state_overrides = self._sort_overrides(override_state)
 
         # bound the amount to be swapped
         bounds: Tuple[float, float] = (
@@ -495,33 +705,80 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
             float(self.max_input),
         )
 
-        # bracket the initial guess for the algo
-        bracket_amount: int = self.max_input
-        bracket: Tuple[float, float, float] = (
-            0.45 * bracket_amount,
-            0.50 * bracket_amount,
-            0.55 * bracket_amount,
-        )
+        # Resolve the swap calculation, input token, and state override for
+        # each pool once, instead of on every evaluation by the optimizer.
+        # Constant product pools also extract their reserves and fee, so the
+        # swap can be calculated inline without a method call.
+        steps: List[
+            Tuple[
+                Callable[..., int],
+                Erc20Token,
+                Optional[Union[UniswapV2PoolState, UniswapV3PoolState]],
+                Optional[Tuple[int, int, int]],
+            ]
+        ] = []
+        for pool, swap_vector, pool_override in zip(
+            self.swap_pools, self._swap_vectors, state_overrides
+        ):
+            constant_product: Optional[Tuple[int, int, int]] = None
+            if isinstance(pool, LiquidityPool) and not (
+                isinstance(pool, CamelotLiquidityPool) and pool.stable_swap
+            ):
+                if TYPE_CHECKING:
+                    assert pool_override is None or isinstance(pool_override, UniswapV2PoolState)
+                if pool_override:
+                    reserves_token0 = pool_override.reserves_token0
+                    reserves_token1 = pool_override.reserves_token1
+                else:
+                    reserves_token0 = pool.reserves_token0
+                    reserves_token1 = pool.reserves_token1
+                if swap_vector.zero_for_one:
+                    reserves_in, reserves_out, fee = (
+                        reserves_token0,
+                        reserves_token1,
+                        pool.fee_token0,
+                    )
+                else:
+                    reserves_in, reserves_out, fee = (
+                        reserves_token1,
+                        reserves_token0,
+                        pool.fee_token1,
+                    )
+                constant_product = (
+                    reserves_in * fee.denominator,
+                    reserves_out,
+                    fee.denominator - fee.numerator,
+                )
+            steps.append(
+                (
+                    pool.calculate_tokens_out_from_tokens_in,
+                    swap_vector.token_in,
+                    pool_override,
+                    constant_product,
+                )
+            )
 
         def arb_profit(x) -> float:
             token_in_quantity = int(x)  # round the input down
-            token_out_quantity: int = 0
-
-            for i, (pool, swap_vector) in enumerate(zip(self.swap_pools, self._swap_vectors)):
-                pool_override = state_overrides.get(pool.address)
-
-                if TYPE_CHECKING:
-                    assert isinstance(pool, LiquidityPool) and (
-                        pool_override is None or isinstance(pool_override, UniswapV2PoolState)
-                    )
-                    assert isinstance(pool, V3LiquidityPool) and (
-                        pool_override is None or isinstance(pool_override, UniswapV3PoolState)
+            token_out_quantity: int = token_in_quantity
+
+            for calculate_tokens_out, token_in, pool_override, constant_product in steps:
+                if constant_product is not None:
+                    # Identical to LiquidityPool.calculate_tokens_out_from_tokens_in
+                    if token_out_quantity <= 0:
+                        token_out_quantity = 0
+                        break
+                    scaled_reserves_in, reserves_out, fee_multiplier = constant_product
+                    amount_in_with_fee = token_out_quantity * fee_multiplier
+                    token_out_quantity = (amount_in_with_fee * reserves_out) // (
+                        scaled_reserves_in + amount_in_with_fee
                     )
+                    continue
 
                 try:
-                    token_out_quantity = pool.calculate_tokens_out_from_tokens_in(
-                        token_in=swap_vector.token_in,
-                        token_in_quantity=token_in_quantity if i == 0 else token_out_quantity,
+                    token_out_quantity = calculate_tokens_out(
+                        token_in=token_in,
+                        token_in_quantity=token_out_quantity,
                         override_state=pool_override,
                     )
                 except (EVMRevertError, LiquidityPoolError):
@@ -532,22 +789,56 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
                     token_out_quantity = 0
                     break
 
-            # minimize_scalar requires the function to have a minimum value
-            # for the solver to settle on an optimum input, so return the
+            # the solver requires the function to have a minimum value to
+            # settle on an optimum input, so return the
             # negated profit
             return -float(token_out_quantity - token_in_quantity)
 
-        opt = minimize_scalar(
-            fun=arb_profit,
-            method="bounded",
-            bounds=bounds,
-            bracket=bracket,
-            options={"xatol": 1.0},
-        )
+        optimal_input: float
+        optimal_fun: float
+        estimated_input = self._estimate_optimal_input(state_overrides)
+        if estimated_input is not None:
+            # the analytic optimum is exact for constant product pools, so
+            # the optimizer is unnecessary
+            optimal_input = min(max(estimated_input, bounds[0]), bounds[1])
+
+            # The pools round each swap output down, so reduce the input to
+            # the smallest amount that still buys the same output from the
+            # first pool
+            first_pool = self.swap_pools[0]
+            if TYPE_CHECKING:
+                assert isinstance(first_pool, LiquidityPool)
+            first_override = state_overrides[0]
+            if TYPE_CHECKING:
+                assert first_override is None or isinstance(first_override, UniswapV2PoolState)
+            try:
+                first_output = first_pool.calculate_tokens_out_from_tokens_in(
+                    token_in=self.input_token,
+                    token_in_quantity=int(optimal_input),
+                    override_state=first_override,
+                )
+                if first_output > 0:
+                    # kept as an int, since a float cannot represent the
+                    # exact amount
+                    optimal_input = first_pool.calculate_tokens_in_from_tokens_out(
+                        token_in=self.input_token,
+                        token_out_quantity=first_output,
+                        override_state=first_override,
+                    )
+            except LiquidityPoolError:
+                pass
+
+            optimal_fun = arb_profit(optimal_input)
+        else:
+            optimal_input, optimal_fun = brent_bounded(
+                arb_profit,
+                *bounds,
+                xatol=1.0,
+            )
 
         # Negate the result to convert to a sensible value (positive profit)
-        best_profit = -int(opt.fun)
-        swap_amount = int(opt.x)
+        best_profit = -int(optimal_fun)
+        swap_amount = int(optimal_input)
 
         try:
             best_amounts = self._build_amounts_out(
@@ -574,6 +865,71 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
             swap_amounts=best_amounts,
         )
 
+    def _estimate_optimal_input(
+        self,
+        state_overrides: List[Optional[Union[UniswapV2PoolState, UniswapV3PoolState]]],
+    ) -> Optional[float]:
+        """
+        Calculate the profit-maximizing input for a path of constant product
+        (Uniswap V2) pools.
+
+        Consecutive constant product swaps are equivalent to a single
+        constant product swap through a virtual pool, found by folding each
+        pool into the previous result:
+
+        E_in' = E_in * R_in / (R_in + g * E_out)
+        E_out' = g * E_out * R_out / (R_in + g * E_out)
+
+        where R_in/R_out are the pool reserves in the direction of the swap
+        and g is the fee multiplier (1 - fee) of the pool. The optimal input
+        to the virtual pool, with fee multiplier g0 for the first pool, is
+        where its marginal output equals 1:
+
+        x* = (sqrt(g0 * E_in * E_out) - E_in) / g0
+
+        Returns None if any pool along the path is not a constant product
+        pool.
+        """
+
+        virtual_reserves_in: float = 0.0
+        virtual_reserves_out: float = 0.0
+        first_fee_multiplier: float = 0.0
+
+        for i, (pool, vector, fee_multiplier, pool_override) in enumerate(
+            zip(self.swap_pools, self._swap_vectors, self._fee_multipliers, state_overrides)
+        ):
+            if not isinstance(pool, LiquidityPool) or (
+                isinstance(pool, CamelotLiquidityPool) and pool.stable_swap
+            ):
+                return None
+
+            pool_state = pool_override or pool.state
+            if TYPE_CHECKING:
+                assert isinstance(pool_state, UniswapV2PoolState)
+
+            if vector.zero_for_one:
+                reserves_in = pool_state.reserves_token0
+                reserves_out = pool_state.reserves_token1
+            else:
+                reserves_in = pool_state.reserves_token1
+                reserves_out = pool_state.reserves_token0
+
+            if i == 0:
+                virtual_reserves_in = float(reserves_in)
+                virtual_reserves_out = float(reserves_out)
+                first_fee_multiplier = fee_multiplier
+            else:
+                denominator = reserves_in + fee_multiplier * virtual_reserves_out
+                virtual_reserves_in = virtual_reserves_in * reserves_in / denominator
+                virtual_reserves_out = (
+                    fee_multiplier * virtual_reserves_out * reserves_out / denominator
+                )
+
+        return (
+            sqrt(first_fee_multiplier * virtual_reserves_in * virtual_reserves_out)
+            - virtual_reserves_in
+        ) / first_fee_multiplier
+
     def calculate(
         self,
         override_state: Optional[
@@ -591,9 +947,10 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         Stateless calculation that does not use `self.best`
         """
 
-        self._pre_calculation_check(override_state)
+        state_overrides = self._sort_overrides(override_state)
+        self._pre_calculation_check(state_overrides)
 
-        return self._calculate(override_state=override_state)
+        return self._calculate_sorted(state_overrides)
 
     async def calculate_with_pool(
         self,
@@ -634,20 +991,114 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         """
 
         if any(
-            [pool._sparse_bitmap for pool in self.swap_pools if isinstance(pool, V3LiquidityPool)]
+            pool._sparse_bitmap for pool in self.swap_pools if isinstance(pool, V3LiquidityPool)
         ):
             raise ValueError(
                 f"Cannot calculate {self} with executor. One or more V3 pools has a sparse bitmap."
             )
 
-        self._pre_calculation_check(override_state)
+        state_overrides = self._sort_overrides(override_state)
+        self._pre_calculation_check(state_overrides)
 
         return asyncio.get_running_loop().run_in_executor(
             executor,
-            self._calculate,
-            override_state,
+            self._calculate_sorted,
+            state_overrides,
         )
 
+    @classmethod
+    async def calculate_many(
+        cls,
+        cycles: Sequence["UniswapLpCycle"],
+        executor: Union["ProcessPoolExecutor", "ThreadPoolExecutor"],
+        override_state: Optional[
+            Sequence[
+                Union[
+                    Tuple[LiquidityPool, UniswapV2PoolState],
+                    Tuple[LiquidityPool, UniswapV2PoolSimulationResult],
+                    Tuple[V3LiquidityPool, UniswapV3PoolState],
+                    Tuple[V3LiquidityPool, UniswapV3PoolSimulationResult],
+                ]
+            ]
+        ] = None,
+        chunk_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> List[Union[ArbitrageCalculationResult, ArbitrageError]]:
+        """
+        Calculate many arbitrage cycles using the specified executor. The
+        cycles are submitted in chunks, so the overrides are pickled and
+        transferred once per chunk instead of once per cycle.
+
+        Arguments
+        ---------
+        cycles : Sequence[UniswapLpCycle]
+            The arbitrage helpers to calculate.
+        executor : Executor
+            An executor (from `concurrent.futures`) to process the calculation
+            work. Both `ThreadPoolExecutor` and `ProcessPoolExecutor` are
+            supported, but `ProcessPoolExecutor` is recommended.
+        override_state : StateOverrideTypes, optional
+            An sequence of tuples, representing an ordered pair of helper
+            objects for Uniswap V2 / V3 pools and their overridden states.
+            The overrides are applied to every cycle.
+        chunk_size : int, optional
+            The number of cycles sent to the executor in each submission. By
+            default, the cycles are split into four chunks per worker.
+        max_workers : int, optional
+            The number of workers used by the executor, which sets the default
+            `chunk_size`. Defaults to the number of CPUs.
+
+        Returns
+        -------
+        A list, in the same order as `cycles`, holding an
+        `ArbitrageCalculationResult` for each successful calculation, or the
+        `ArbitrageError` raised by an unsuccessful one. Any other exception
+        raised by a calculation is not caught, and is raised from this call
+        without returning the results of the other cycles.
+
+        Notes
+        -----
+        This is an async function that must be called with the `await` keyword.
+        """
+
+        for cycle in cycles:
+            if any(
+                pool._sparse_bitmap
+                for pool in cycle.swap_pools
+                if isinstance(pool, V3LiquidityPool)
+            ):
+                raise ValueError(
+                    f"Cannot calculate {cycle} with executor. "
+                    "One or more V3 pools has a sparse bitmap."
+                )
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        elif max_workers < 1:
+            raise ValueError("max_workers must be positive")
+
+        if chunk_size is None:
+            chunk_size = max(1, len(cycles) // (4 * max_workers))
+        elif chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        cycle_chunks = [cycles[i : i + chunk_size] for i in range(0, len(cycles), chunk_size)]
+
+        loop = asyncio.get_running_loop()
+        chunk_results = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    executor,
+                    _calculate_cycles,
+                    cycle_chunk,
+                    override_state,
+                )
+                for cycle_chunk in cycle_chunks
+            ]
+        )
+
+        return [result for chunk_result in chunk_results for result in chunk_result]
+
     def calculate_arbitrage_return_best(
         self,
         override_state: Optional[
@@ -687,7 +1138,10 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         TBD
         """
 
-        result = self._calculate(override_state=override_state)
+        state_overrides = self._sort_overrides(override_state)
+        self._pre_calculation_check(state_overrides)
+
+        result = self._calculate_sorted(state_overrides)
 
         if override_state is None:
             self.best.update(
@@ -786,7 +1240,7 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         """
         Generate a list of ABI-encoded calldata for each step in the swap path.
 
-        Calldata is built using the eth_abi.encode method and the ABI for the
+        Calldata is built with fixed encoders matching the ABI for the
         ``swap`` function at the Uniswap pool. V2 and V3 pools are supported.
 
         Arguments
@@ -818,7 +1272,7 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
             were invalid
         """
 
-        from_address = to_checksum_address(from_address)
+        from_address = get_checksum_address(from_address)
 
         if swap_amount is None:
             swap_amount = self.best["swap_amount"]
@@ -834,125 +1288,56 @@ class UniswapLpCycle(Subscriber, ArbitrageHelper):
         if not pool_swap_amounts:
             raise ArbitrageError("Pool amounts empty, abandoning payload generation.")
 
+        if len(pool_swap_amounts) != len(self.swap_pools):
+            raise ArbitrageError(
+                f"Expected swap amounts for {len(self.swap_pools)} pools, "
+                f"got {len(pool_swap_amounts)}."
+            )
+
         payloads = []
         msg_value: int = 0  # This arbitrage does not require a `msg.value` payment
 
-        first_pool = self.swap_pools[0]
-        last_pool = self.swap_pools[-1]
-
         try:
-            if isinstance(first_pool, LiquidityPool):
+            if self._payload_transfer is not None:
                 # Special case: If first pool is type V2, input token must be
                 # transferred prior to the swap
+                input_token_address, transfer_prefix = self._payload_transfer
                 payloads.append(
                     (
                         # address
-                        self.input_token.address,
+                        input_token_address,
                         # bytes calldata
-                        Web3.keccak(text="transfer(address,uint256)")[:4]
-                        + eth_abi.encode(
-                            types=(
-                                "address",
-                                "uint256",
-                            ),
-                            args=(
-                                first_pool.address,
-                                swap_amount,
-                            ),
-                        ),
+                        transfer_prefix + _encode_uint(swap_amount),
                         msg_value,
                     )
                 )
 
-            for i, (swap_pool, _swap_amounts) in enumerate(zip(self.swap_pools, pool_swap_amounts)):
-                if swap_pool is last_pool:
-                    next_pool = None
-                else:
-                    next_pool = self.swap_pools[i + 1]
-
-                if next_pool is not None:
-                    # V2 pools require a pre-swap transfer, so the contract
-                    # does not have to perform intermediate custody and the
-                    # swap can send the tokens directly to the next pool
-                    if isinstance(next_pool, LiquidityPool):
-                        swap_destination_address = next_pool.address
-                    # V3 pools cannot accept a pre-swap transfer, so the contract
-                    # must maintain custody prior to a swap
-                    elif isinstance(next_pool, V3LiquidityPool):
-                        swap_destination_address = from_address
-                else:
-                    # Set the destination address for the last swap to the
-                    # sending address
+            for i, (
+                (pool_address, encode_swap, swap_destination_address),
+                _swap_amounts,
+            ) in enumerate(zip(self._payload_steps, pool_swap_amounts)):
+                if swap_destination_address is None:
                     swap_destination_address = from_address
 
-                if isinstance(swap_pool, LiquidityPool):
-                    if TYPE_CHECKING:
-                        assert isinstance(_swap_amounts, UniswapV2PoolSwapAmounts)
-                    logger.debug(f"PAYLOAD: building V2 swap at pool {i}")
-                    logger.debug(f"PAYLOAD: pool address {swap_pool.address}")
-                    logger.debug(f"PAYLOAD: swap amounts {_swap_amounts}")
-                    logger.debug(f"PAYLOAD: destination address {swap_destination_address}")
-                    payloads.append(
-                        (
-                            # address
-                            swap_pool.address,
-                            # bytes calldata
-                            Web3.keccak(text="swap(uint256,uint256,address,bytes)")[:4]
-                            + eth_abi.encode(
-                                types=(
-                                    "uint256",
-                                    "uint256",
-                                    "address",
-                                    "bytes",
-                                ),
-                                args=(
-                                    *_swap_amounts.amounts,
-                                    swap_destination_address,
-                                    b"",
-                                ),
-                            ),
-                            msg_value,
-                        )
-                    )
-                elif isinstance(swap_pool, V3LiquidityPool):
-                    if TYPE_CHECKING:
-                        assert isinstance(_swap_amounts, UniswapV3PoolSwapAmounts)
-                    logger.debug(f"PAYLOAD: building V3 swap at pool {i}")
-                    logger.debug(f"PAYLOAD: pool address {swap_pool.address}")
-                    logger.debug(f"PAYLOAD: swap amounts {_swap_amounts}")
-                    logger.debug(f"PAYLOAD: destination address {swap_destination_address}")
-                    payloads.append(
-                        (
-                            # address
-                            swap_pool.address,
-                            # bytes calldata
-                            Web3.keccak(text="swap(address,bool,int256,uint160,bytes)")[:4]
-                            + eth_abi.encode(
-                                types=(
-                                    "address",
-                                    "bool",
-                                    "int256",
-                                    "uint160",
-                                    "bytes",
-                                ),
-                                args=(
-                                    swap_destination_address,
-                                    _swap_amounts.zero_for_one,
-                                    _swap_amounts.amount_specified,
-                                    _swap_amounts.sqrt_price_limit_x96,
-                                    b"",
-                                ),
-                            ),
-                            msg_value,
-                        )
-                    )
-                else:
-                    raise ValueError(
-                        f"Could not identify pool: {swap_pool}, type={type(swap_pool)}"
+                # Pass the values as arguments, so the messages are only
+                # formatted if debug logging is enabled
+                logger.debug("PAYLOAD: building swap at pool %s", i)
+                logger.debug("PAYLOAD: pool address %s", pool_address)
+                logger.debug("PAYLOAD: swap amounts %s", _swap_amounts)
+                logger.debug("PAYLOAD: destination address %s", swap_destination_address)
+                payloads.append(
+                    (
+                        # address
+                        pool_address,
+                        # bytes calldata
+                        encode_swap(_swap_amounts, swap_destination_address),
+                        msg_value,
                     )
-        except Exception as e:
-            logger.exception("generate_payloads catch-all")
-            raise ArbitrageError(f"generate_payloads (catch-all)): {e}") from e
+                )
+        except ValueError as e:
+            # The encoders reject amounts or addresses that cannot be
+            # represented in the calldata
+            raise ArbitrageError(f"generate_payloads: invalid input: {e}") from e
 
         return payloads
 
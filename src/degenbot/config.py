@@ -1,6 +1,8 @@
 from typing import Callable, Optional
 
-from web3 import Web3
+from requests import Session
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider, Web3
 
 _web3: Optional[Web3] = None
 
@@ -9,6 +11,31 @@ def get_web3() -> Optional[Web3]:
     return _web3
 
 
+def build_http_web3(
+    endpoint_uri: str,
+    pool_size: int = 100,
+    timeout: int = 30,
+) -> Web3:
+    """
+    Build a Web3 object for an HTTP endpoint, with a connection pool large
+    enough for many helpers to poll the node concurrently. The default
+    requests session only keeps 10 connections per host.
+    """
+
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return Web3(
+        HTTPProvider(
+            endpoint_uri,
+            request_kwargs={"timeout": timeout},
+            session=session,
+        )
+    )
+
+
 def set_web3(w3: Web3):
     connected_method: Optional[Callable] = None
 
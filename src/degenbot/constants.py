@@ -28,6 +28,11 @@ ZERO_ADDRESS: ChecksumAddress = to_checksum_address(
     "0x0000000000000000000000000000000000000000"
 )
 
+# Multicall3 is deployed at the same address on all supported chains
+MULTICALL3_ADDRESS: ChecksumAddress = to_checksum_address(
+    "0xcA11bde05977b3631167028862bE2a173976CA11"
+)
+
 
 # Contract addresses for the native blockchain token, keyed by chain ID
 WRAPPED_NATIVE_TOKENS: Dict[int, ChecksumAddress] = {
@@ -1,4 +1,19 @@
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Union
+
+from eth_typing import ChecksumAddress
+from eth_utils.address import to_checksum_address
+
+
+@lru_cache(maxsize=4096)
+def get_checksum_address(address: Union[str, bytes]) -> ChecksumAddress:
+    """
+    Get the checksummed version of an address. Checksumming requires a keccak
+    hash of the address, so the results are cached for the addresses
+    (tokens, pools, factories) that are looked up repeatedly.
+    """
+
+    return to_checksum_address(address)
 
 
 def next_base_fee(
@@ -1,10 +1,9 @@
 from threading import Lock
 from typing import TYPE_CHECKING, Dict, Optional
 
-from eth_utils.address import to_checksum_address
-
 from ..config import get_web3
 from ..exceptions import ManagerError
+from ..functions import get_checksum_address
 from ..erc20_token import Erc20Token
 from ..baseclasses import HelperManager
 
@@ -96,7 +95,7 @@ class Erc20TokenHelperManager(HelperManager):
         Get the token object from its address
         """
 
-        address = to_checksum_address(address)
+        address = get_checksum_address(address)
 
         if token_helper := self._erc20tokens.get(address):
             return token_helper
@@ -2,7 +2,6 @@ from threading import Lock
 from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, Union
 
 from eth_typing import ChecksumAddress
-from eth_utils.address import to_checksum_address
 from web3 import Web3
 
 from ..baseclasses import HelperManager
@@ -11,6 +10,7 @@ from ..constants import ZERO_ADDRESS
 from ..dex.uniswap import FACTORY_ADDRESSES, TICKLENS_ADDRESSES
 from ..erc20_token import Erc20Token
 from ..exceptions import ManagerError, PoolNotAssociated
+from ..functions import get_checksum_address
 from ..logging import logger
 from ..manager import AllPools, Erc20TokenHelperManager
 from .abi import UNISWAP_V2_FACTORY_ABI
@@ -66,7 +66,7 @@ class UniswapLiquidityPoolManager(HelperManager):
         """
         cls.add_chain(chain_id=chain_id)
 
-        factory_address = to_checksum_address(factory_address)
+        factory_address = get_checksum_address(factory_address)
 
         if not FACTORY_ADDRESSES[chain_id].get(factory_address):
             FACTORY_ADDRESSES[chain_id][factory_address] = {}
@@ -77,7 +77,7 @@ class UniswapLiquidityPoolManager(HelperManager):
         Add a pool_init_hash for a factory at a given chain ID.
         """
 
-        factory_address = to_checksum_address(factory_address)
+        factory_address = get_checksum_address(factory_address)
 
         cls.add_factory(chain_id=chain_id, factory_address=factory_address)
 
@@ -114,7 +114,7 @@ class UniswapV2LiquidityPoolManager(UniswapLiquidityPoolManager):
 
         chain_id = chain_id or _web3.eth.chain_id
 
-        factory_address = to_checksum_address(factory_address)
+        factory_address = get_checksum_address(factory_address)
 
         if factory_address not in FACTORY_ADDRESSES[chain_id]:
             raise ManagerError(
@@ -155,7 +155,7 @@ class UniswapV2LiquidityPoolManager(UniswapLiquidityPoolManager):
         if isinstance(pool, LiquidityPool):
             pool_address = pool.address
         else:
-            pool_address = to_checksum_address(pool)
+            pool_address = get_checksum_address(pool)
 
         try:
             del self._tracked_pools[pool_address]
@@ -190,7 +190,7 @@ class UniswapV2LiquidityPoolManager(UniswapLiquidityPoolManager):
                 raise ValueError("Provide exactly two token addresses")
 
             checksummed_token_addresses = tuple(
-                [to_checksum_address(token_address) for token_address in token_addresses]
+                [get_checksum_address(token_address) for token_address in token_addresses]
             )
 
             try:
@@ -205,14 +205,14 @@ class UniswapV2LiquidityPoolManager(UniswapLiquidityPoolManager):
             if pool_address == ZERO_ADDRESS:
                 raise ManagerError("No V2 LP available")
 
-            pool_address = to_checksum_address(
+            pool_address = get_checksum_address(
                 self._w3_contract.functions.getPair(*checksummed_token_addresses).call()
             )
 
         if TYPE_CHECKING:
             assert pool_address is not None
         # Address is now known, check if the pool is already being tracked
-        pool_address = to_checksum_address(pool_address)
+        pool_address = get_checksum_address(pool_address)
 
         if pool_address in self._untracked_pools:
             raise PoolNotAssociated(
@@ -286,7 +286,7 @@ class UniswapV3LiquidityPoolManager(UniswapLiquidityPoolManager):
 
         chain_id = chain_id or _web3.eth.chain_id
 
-        factory_address = to_checksum_address(factory_address)
+        factory_address = get_checksum_address(factory_address)
 
         if factory_address not in FACTORY_ADDRESSES[chain_id]:
             raise ManagerError(
@@ -304,7 +304,7 @@ class UniswapV3LiquidityPoolManager(UniswapLiquidityPoolManager):
             try:
                 self._w3 = _web3
                 self.chain_id = chain_id
-                self._factory_address = to_checksum_address(factory_address)
+                self._factory_address = get_checksum_address(factory_address)
                 self._lens = TickLens(address=TICKLENS_ADDRESSES[chain_id][factory_address])
                 self._lock = Lock()
                 self._tracked_pools: Dict[ChecksumAddress, V3LiquidityPool] = {}
@@ -326,7 +326,7 @@ class UniswapV3LiquidityPoolManager(UniswapLiquidityPoolManager):
         if isinstance(pool, V3LiquidityPool):
             pool_address = pool.address
         else:
-            pool_address = to_checksum_address(pool)
+            pool_address = get_checksum_address(pool)
 
         try:
             del self._tracked_pools[pool_address]
@@ -429,7 +429,7 @@ class UniswapV3LiquidityPoolManager(UniswapLiquidityPoolManager):
             # print(f"building V3 pool from address")
             if token_addresses is not None or pool_fee is not None:
                 raise ValueError("Conflicting arguments provided. Pass address OR tokens+fee")
-            pool_address = to_checksum_address(pool_address)
+            pool_address = get_checksum_address(pool_address)
         elif token_addresses is not None and pool_fee is not None:
             # print(f"building V3 pool from address and fee")
             if len(token_addresses) != 2:
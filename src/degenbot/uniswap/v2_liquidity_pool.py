@@ -338,6 +338,62 @@ class LiquidityPool(SubscriptionMixin, PoolHelper):
             )
         self._notify_subscribers()
 
+    def apply_polled_reserves(
+        self,
+        reserves_token0: int,
+        reserves_token1: int,
+        update_block: int,
+        silent: bool = False,
+        print_reserves: bool = True,
+        print_ratios: bool = True,
+    ) -> bool:
+        """
+        Records reserves read from the pool contract at `update_block`, either
+        by `update_reserves` or by a batched `getReserves()` call made outside
+        the helper. Returns True if the reserves changed.
+        """
+
+        if update_block < self.update_block:
+            raise ExternalUpdateError(
+                f"Current state recorded at block {self.update_block}, "
+                f"received update for stale block {update_block}"
+            )
+        else:
+            self.update_block = update_block
+
+        if (self.reserves_token0, self.reserves_token1) == (
+            reserves_token0,
+            reserves_token1,
+        ):
+            return False
+
+        self.reserves_token0, self.reserves_token1 = (
+            reserves_token0,
+            reserves_token1,
+        )
+        if not silent:
+            logger.info(f"[{self.name}]")
+            if print_reserves:
+                logger.info(f"{self.token0}: {self.reserves_token0}")
+                logger.info(f"{self.token1}: {self.reserves_token1}")
+            if print_ratios:
+                normalized_reserves_token0 = self.reserves_token0 / 10**self.token0.decimals
+                normalized_reserves_token1 = self.reserves_token1 / 10**self.token1.decimals
+                logger.info(
+                    f"{self.token0}/{self.token1}: "
+                    f"{normalized_reserves_token0 / normalized_reserves_token1}"
+                )
+                logger.info(
+                    f"{self.token1}/{self.token0}: "
+                    f"{normalized_reserves_token1 / normalized_reserves_token0}"
+                )
+
+        # recalculate possible swaps using the new reserves
+        self.calculate_tokens_in_from_ratio_out()
+        self._update_pool_state()
+        self._pool_state_archive[update_block] = self.state
+        return True
+
     def calculate_tokens_in_from_ratio_out(self) -> None:
         """
         Calculates the maximum token inputs for the target output ratios at current pool reserves
@@ -477,6 +533,37 @@ class LiquidityPool(SubscriptionMixin, PoolHelper):
         denominator = (reserves_out - token_out_quantity) * (fee.denominator - fee.numerator)
         return numerator // denominator + 1
 
+    def calculate_tokens_in_from_tokens_out_raw(
+        self,
+        zero_for_one: bool,
+        token_out_quantity: int,
+    ) -> int:
+        """
+        Calculates the required token INPUT for a target OUTPUT at current pool reserves.
+        Identical to `calculate_tokens_in_from_tokens_out`, except that the swap direction is
+        specified by `zero_for_one` instead of an `Erc20Token`. Intended for hot paths where
+        the direction has been determined in advance.
+        """
+
+        if zero_for_one:
+            reserves_in = self.reserves_token0
+            reserves_out = self.reserves_token1
+            fee = self.fee_token0
+        else:
+            reserves_in = self.reserves_token1
+            reserves_out = self.reserves_token0
+            fee = self.fee_token1
+
+        # last token becomes infinitely expensive, so largest possible swap out is reserves - 1
+        if token_out_quantity > reserves_out - 1:
+            raise LiquidityPoolError(
+                f"Requested amount out ({token_out_quantity}) >= pool reserves ({reserves_out})"
+            )
+
+        numerator = reserves_in * token_out_quantity * fee.denominator
+        denominator = (reserves_out - token_out_quantity) * (fee.denominator - fee.numerator)
+        return numerator // denominator + 1
+
     def calculate_tokens_out_from_tokens_in(
         self,
         token_in: "Erc20Token",
@@ -546,6 +633,36 @@ class LiquidityPool(SubscriptionMixin, PoolHelper):
 
         return numerator // denominator
 
+    def calculate_tokens_out_from_tokens_in_raw(
+        self,
+        zero_for_one: bool,
+        token_in_quantity: int,
+    ) -> int:
+        """
+        Calculates the expected token OUTPUT for a target INPUT at current pool reserves.
+        Identical to `calculate_tokens_out_from_tokens_in`, except that the swap direction is
+        specified by `zero_for_one` instead of an `Erc20Token`. Intended for hot paths where
+        the direction has been determined in advance.
+        """
+
+        if token_in_quantity <= 0:
+            raise ZeroSwapError("token_in_quantity must be positive")
+
+        if zero_for_one:
+            reserves_in = self.reserves_token0
+            reserves_out = self.reserves_token1
+            fee = self.fee_token0
+        else:
+            reserves_in = self.reserves_token1
+            reserves_out = self.reserves_token0
+            fee = self.fee_token1
+
+        amount_in_with_fee = token_in_quantity * (fee.denominator - fee.numerator)
+        numerator = amount_in_with_fee * reserves_out
+        denominator = reserves_in * fee.denominator + amount_in_with_fee
+
+        return numerator // denominator
+
     def restore_state_before_block(
         self,
         block: int,
@@ -795,34 +912,14 @@ class LiquidityPool(SubscriptionMixin, PoolHelper):
                 ) = self._w3_contract.functions.getReserves().call(
                     block_identifier=self.update_block
                 )
-                if (self.reserves_token0, self.reserves_token1) != (
-                    reserves0,
-                    reserves1,
-                ):
-                    self.reserves_token0, self.reserves_token1 = (
-                        reserves0,
-                        reserves1,
-                    )
-                    if not silent:
-                        logger.info(f"[{self.name}]")
-                        if print_reserves:
-                            logger.info(f"{self.token0}: {self.reserves_token0}")
-                            logger.info(f"{self.token1}: {self.reserves_token1}")
-                        if print_ratios:
-                            logger.info(
-                                f"{self.token0}/{self.token1}: {(self.reserves_token0/10**self.token0.decimals) / (self.reserves_token1/10**self.token1.decimals)}"
-                            )
-                            logger.info(
-                                f"{self.token1}/{self.token0}: {(self.reserves_token1/10**self.token1.decimals) / (self.reserves_token0/10**self.token0.decimals)}"
-                            )
-
-                    # recalculate possible swaps using the new reserves
-                    self.calculate_tokens_in_from_ratio_out()
-                    self._update_pool_state()
-                    self._pool_state_archive[update_block] = self.state
-                    success = True
-                else:
-                    success = False
+                success = self.apply_polled_reserves(
+                    reserves_token0=reserves0,
+                    reserves_token1=reserves1,
+                    update_block=update_block,
+                    silent=silent,
+                    print_reserves=print_reserves,
+                    print_ratios=print_ratios,
+                )
             except Exception as e:
                 print(f"LiquidityPool: Exception in update_reserves (polling): {e}")
         elif self._update_method == "external":
@@ -872,6 +969,30 @@ class LiquidityPool(SubscriptionMixin, PoolHelper):
 class CamelotLiquidityPool(LiquidityPool):
     FEE_DENOMINATOR = 100_000
 
+    def __getstate__(self) -> dict:
+        # `stable_swap` is not a slot of the parent class, so add it to the
+        # pickled state explicitly
+        state = super().__getstate__()
+        state["stable_swap"] = self.stable_swap
+        return state
+
+    def calculate_tokens_out_from_tokens_in_raw(
+        self,
+        zero_for_one: bool,
+        token_in_quantity: int,
+    ) -> int:
+        """
+        Calculates the expected token OUTPUT for a target INPUT at current pool reserves,
+        using the stable-swap calculation for stable-only pools.
+        """
+
+        if self.stable_swap:
+            return self._calculate_tokens_out_from_tokens_in_stable_swap(
+                token_in=self.token0 if zero_for_one else self.token1,
+                token_in_quantity=token_in_quantity,
+            )
+        return super().calculate_tokens_out_from_tokens_in_raw(zero_for_one, token_in_quantity)
+
     def _calculate_tokens_out_from_tokens_in_stable_swap(
         self,
         token_in: "Erc20Token",
@@ -1054,6 +1175,8 @@ class CamelotLiquidityPool(LiquidityPool):
             silent=silent,
         )
 
+        self.stable_swap = stable_pool
+
         if stable_pool:
             # replace the calculate_tokens_out_from_tokens_in method for stable-only pools
             self.calculate_tokens_out_from_tokens_in = (
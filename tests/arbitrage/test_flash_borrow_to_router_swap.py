@@ -0,0 +1,490 @@
+from fractions import Fraction
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import eth_abi
+import pytest
+from scipy import optimize  # type: ignore[import]
+from degenbot import Erc20Token
+from degenbot.arbitrage import flash_borrow_to_router_swap
+from degenbot.arbitrage.flash_borrow_to_router_swap import FlashBorrowToRouterSwap
+from degenbot.constants import MULTICALL3_ADDRESS
+from degenbot.exceptions import ExternalUpdateError
+from degenbot.uniswap import LiquidityPool
+from eth_utils import to_checksum_address
+
+
+class MockErc20Token(Erc20Token):
+    def __init__(self):
+        pass
+
+
+class MockLiquidityPool(LiquidityPool):
+    def __init__(self):
+        self._state_lock = Lock()
+        self._subscribers = set()
+
+
+class MockGetReservesCall:
+    def __init__(self, pool: "MockLiquidityPool"):
+        self.pool = pool
+
+    def call(self, block_identifier: int) -> Tuple[int, int, int]:
+        self.pool.reserves_calls += 1
+        return (*self.pool.chain_reserves, 0)
+
+
+class MockPoolFunctions:
+    def __init__(self, pool: "MockLiquidityPool"):
+        self.pool = pool
+
+    def getReserves(self) -> MockGetReservesCall:
+        return MockGetReservesCall(self.pool)
+
+
+class MockPoolContract:
+    def __init__(self, pool: "MockLiquidityPool"):
+        self.functions = MockPoolFunctions(pool)
+
+
+class MockEth:
+    chain_id = 1
+
+    def __init__(self):
+        self.block_number = 1
+        self.multicalls = 0
+        self.multicall_error: Optional[Exception] = None
+        self.pools: Dict[str, MockLiquidityPool] = {}
+
+    def get_block_number(self) -> int:
+        return self.block_number
+
+    def call(self, transaction: dict, block_identifier: int) -> bytes:
+        # Answer a Multicall3 aggregate call for the registered pools
+        self.multicalls += 1
+        if self.multicall_error is not None:
+            raise self.multicall_error
+
+        assert transaction["to"] == MULTICALL3_ADDRESS
+        (calls,) = eth_abi.decode(
+            types=("(address,bytes)[]",),
+            data=transaction["data"][4:],
+        )
+        return eth_abi.encode(
+            types=("uint256", "bytes[]"),
+            args=(
+                block_identifier,
+                [
+                    eth_abi.encode(
+                        types=("uint112", "uint112", "uint32"),
+                        args=(*self.pools[to_checksum_address(address)].chain_reserves, 0),
+                    )
+                    for address, _ in calls
+                ],
+            ),
+        )
+
+
+class MockWeb3:
+    def __init__(self):
+        self.eth = MockEth()
+
+
+class MockErc20TokenHelperManager:
+    def __init__(self, chain_id: int):
+        pass
+
+    def get_erc20token(self, address: str) -> Erc20Token:
+        return TOKENS[address]
+
+
+def _make_token(address: str, decimals: int, symbol: str) -> MockErc20Token:
+    token = MockErc20Token()
+    token.address = to_checksum_address(address)
+    token.decimals = decimals
+    token.name = symbol
+    token.symbol = symbol
+    return token
+
+
+wbtc = _make_token("0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599", 8, "WBTC")
+weth = _make_token("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2", 18, "WETH")
+usdc = _make_token("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48", 6, "USDC")
+TOKENS = {token.address: token for token in (wbtc, weth, usdc)}
+
+
+def _make_pool(
+    address: str,
+    token0: Erc20Token,
+    token1: Erc20Token,
+    reserves_token0: int,
+    reserves_token1: int,
+) -> MockLiquidityPool:
+    lp = MockLiquidityPool()
+    lp.name = f"{token0}-{token1} (V2, 0.30%)"
+    lp.address = to_checksum_address(address)
+    lp.factory = to_checksum_address("0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f")
+    lp.fee = None
+    lp.fee_token0 = Fraction(3, 1000)
+    lp.fee_token1 = Fraction(3, 1000)
+    lp.reserves_token0 = reserves_token0
+    lp.reserves_token1 = reserves_token1
+    lp.token0 = token0
+    lp.token1 = token1
+    lp.update_block = 0
+    lp._pool_state_archive = {}
+    lp._ratio_token0_in = None
+    lp._ratio_token1_in = None
+    lp._update_method = "polling"
+    lp._w3_contract = MockPoolContract(lp)  # type: ignore[assignment]
+    lp._update_pool_state()
+
+    # reserves reported by the mocked node, and the number of direct calls
+    lp.chain_reserves = (reserves_token0, reserves_token1)  # type: ignore[attr-defined]
+    lp.reserves_calls = 0  # type: ignore[attr-defined]
+    return lp
+
+
+def _profit(arb: FlashBorrowToRouterSwap, borrow: int) -> int:
+    # Exact profit of the path, calculated with the token-based pool methods
+    token_in = arb.borrow_token
+    swap_out = borrow
+    for pool in arb.swap_pools:
+        token_out = pool.token1 if token_in == pool.token0 else pool.token0
+        swap_out = pool.calculate_tokens_out_from_tokens_in(token_in, swap_out)
+        token_in = token_out
+    return swap_out - arb.borrow_pool.calculate_tokens_in_from_tokens_out(
+        token_in=arb.repay_token,
+        token_out_quantity=borrow,
+    )
+
+
+def _baseline_optimum(arb: FlashBorrowToRouterSwap) -> Tuple[int, int]:
+    # Borrow amount and profit found by the original bounded search over the
+    # full borrow token reserves
+    if arb.borrow_token == arb.borrow_pool.token0:
+        max_borrow = arb.borrow_pool.reserves_token0
+    else:
+        max_borrow = arb.borrow_pool.reserves_token1
+
+    opt = optimize.minimize_scalar(
+        lambda x: -float(_profit(arb, int(x))),
+        method="bounded",
+        bounds=(1, float(max_borrow)),
+    )
+    return int(opt.x), _profit(arb, int(opt.x))
+
+
+@pytest.fixture
+def w3(monkeypatch: pytest.MonkeyPatch) -> MockWeb3:
+    w3 = MockWeb3()
+    monkeypatch.setattr(flash_borrow_to_router_swap, "get_web3", lambda: w3)
+    monkeypatch.setattr(
+        flash_borrow_to_router_swap,
+        "Erc20TokenHelperManager",
+        MockErc20TokenHelperManager,
+    )
+    monkeypatch.setattr(
+        flash_borrow_to_router_swap,
+        "UniswapV2LiquidityPoolManager",
+        lambda factory_address, chain_id: None,
+    )
+    return w3
+
+
+@pytest.fixture
+def build_arb(w3: MockWeb3, monkeypatch: pytest.MonkeyPatch):
+    def _build_arb(
+        borrow_pool: MockLiquidityPool,
+        swap_pools: List[MockLiquidityPool],
+        swap_tokens: List[Erc20Token],
+    ) -> FlashBorrowToRouterSwap:
+        for pool in (borrow_pool, *swap_pools):
+            pool._w3 = w3  # type: ignore[assignment]
+            w3.eth.pools[pool.address] = pool
+        monkeypatch.setattr(
+            flash_borrow_to_router_swap,
+            "get_v2_pools_from_token_path",
+            lambda tx_path, pool_manager: swap_pools,
+        )
+        return FlashBorrowToRouterSwap(
+            borrow_pool=borrow_pool,
+            borrow_token=swap_tokens[0],
+            swap_factory_address="0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f",
+            swap_router_address="0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D",
+            swap_token_addresses=[token.address for token in swap_tokens],
+        )
+
+    return _build_arb
+
+
+@pytest.fixture
+def single_pool_arb(build_arb) -> FlashBorrowToRouterSwap:
+    # WBTC is cheaper in the borrow pool, so borrowing WBTC there and
+    # selling it for WETH in the swap pool is profitable
+    return build_arb(
+        borrow_pool=_make_pool(
+            "0xBb2b8038a1640196FbE3e38816F3e67Cba72D940",
+            wbtc,
+            weth,
+            16000000000,
+            2500000000000000000000,
+        ),
+        swap_pools=[
+            _make_pool(
+                "0xCEfF51756c56CeFFCA006cD410B03FFC46dd3a58",
+                wbtc,
+                weth,
+                15000000000,
+                2500000000000000000000,
+            )
+        ],
+        swap_tokens=[wbtc, weth],
+    )
+
+
+@pytest.fixture
+def multi_pool_arb(build_arb) -> FlashBorrowToRouterSwap:
+    # WBTC sells for ~16.7 WETH through USDC, but only costs ~15.6 WETH in the
+    # borrow pool
+    return build_arb(
+        borrow_pool=_make_pool(
+            "0xBb2b8038a1640196FbE3e38816F3e67Cba72D940",
+            wbtc,
+            weth,
+            16000000000,
+            2500000000000000000000,
+        ),
+        swap_pools=[
+            _make_pool(
+                "0x004375Dff511095CC5A197A54140a24eFEF3A416",
+                wbtc,
+                usdc,
+                15000000000,
+                5_000_000 * 10**6,
+            ),
+            _make_pool(
+                "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc",
+                usdc,
+                weth,
+                30_000_000 * 10**6,
+                15000 * 10**18,
+            ),
+        ],
+        swap_tokens=[wbtc, usdc, weth],
+    )
+
+
+def test_multicall_reserves_update(single_pool_arb: FlashBorrowToRouterSwap, w3: MockWeb3) -> None:
+    borrow_pool = single_pool_arb.borrow_pool
+    swap_pool = single_pool_arb.swap_pools[0]
+
+    # The first update only calculates the initial arbitrage
+    assert single_pool_arb.update_reserves(silent=True) is True
+    assert w3.eth.multicalls == 1
+    assert single_pool_arb.update_reserves(silent=True) is False
+    assert w3.eth.multicalls == 2
+
+    w3.eth.block_number = 2
+    swap_pool.chain_reserves = (14000000000, 2600000000000000000000)
+    assert single_pool_arb.update_reserves(silent=True) is True
+    assert w3.eth.multicalls == 3
+
+    # The reserves are applied from the multicall without polling the pools
+    assert (swap_pool.reserves_token0, swap_pool.reserves_token1) == swap_pool.chain_reserves
+    assert swap_pool.update_block == 2
+    assert swap_pool.state.reserves_token0 == 14000000000
+    assert swap_pool._pool_state_archive[2] is swap_pool.state
+    assert borrow_pool.reserves_calls == swap_pool.reserves_calls == 0
+
+    # The unchanged pool is still recorded at the new block
+    assert borrow_pool.update_block == 2
+    assert 2 not in borrow_pool._pool_state_archive
+
+
+def test_multicall_failure_falls_back_to_polling(
+    single_pool_arb: FlashBorrowToRouterSwap, w3: MockWeb3
+) -> None:
+    swap_pool = single_pool_arb.swap_pools[0]
+
+    w3.eth.multicall_error = ValueError({"code": -32000, "message": "execution reverted"})
+    w3.eth.block_number = 2
+    swap_pool.chain_reserves = (14000000000, 2600000000000000000000)
+    assert single_pool_arb.update_reserves(silent=True) is True
+
+    # Each pool is polled individually instead
+    assert w3.eth.multicalls == 1
+    assert single_pool_arb.borrow_pool.reserves_calls == swap_pool.reserves_calls == 1
+    assert (swap_pool.reserves_token0, swap_pool.reserves_token1) == swap_pool.chain_reserves
+    assert single_pool_arb.borrow_pool.update_block == swap_pool.update_block == 2
+
+    # Errors that do not come from the RPC or decoding are not hidden
+    w3.eth.multicall_error = TypeError("unexpected bug")
+    with pytest.raises(TypeError):
+        single_pool_arb.update_reserves(silent=True)
+
+
+def test_polled_reserves_from_stale_block(
+    single_pool_arb: FlashBorrowToRouterSwap, w3: MockWeb3
+) -> None:
+    swap_pool = single_pool_arb.swap_pools[0]
+
+    w3.eth.block_number = 5
+    assert single_pool_arb.update_reserves(silent=True) is True
+    assert swap_pool.update_block == 5
+
+    # Reserves from an earlier block are rejected by the multicall path and
+    # by the polling fallback
+    w3.eth.block_number = 4
+    swap_pool.chain_reserves = (14000000000, 2600000000000000000000)
+    with pytest.raises(ExternalUpdateError):
+        single_pool_arb.update_reserves(silent=True)
+
+    w3.eth.multicall_error = ValueError({"code": -32000, "message": "execution reverted"})
+    with pytest.raises(ExternalUpdateError):
+        single_pool_arb.update_reserves(silent=True)
+
+    with pytest.raises(ExternalUpdateError):
+        swap_pool.apply_polled_reserves(14000000000, 2600000000000000000000, 4, silent=True)
+    assert (swap_pool.reserves_token0, swap_pool.reserves_token1) == (
+        15000000000,
+        2500000000000000000000,
+    )
+    assert swap_pool.update_block == 5
+
+
+def test_apply_polled_reserves() -> None:
+    lp = _make_pool(
+        "0xBb2b8038a1640196FbE3e38816F3e67Cba72D940",
+        wbtc,
+        weth,
+        16000000000,
+        2500000000000000000000,
+    )
+    state = lp.state
+
+    # Unchanged reserves only move the pool to the new block
+    assert lp.apply_polled_reserves(16000000000, 2500000000000000000000, 1, silent=True) is False
+    assert lp.update_block == 1
+    assert lp.state is state
+    assert lp._pool_state_archive == {}
+
+    assert lp.apply_polled_reserves(16000000001, 2500000000000000000000, 2, silent=True) is True
+    assert lp.update_block == 2
+    assert lp.state.reserves_token0 == 16000000001
+    assert lp._pool_state_archive[2] is lp.state
+
+
+def test_single_pool_closed_form_optimum(single_pool_arb: FlashBorrowToRouterSwap) -> None:
+    assert single_pool_arb.update_reserves(silent=True) is True
+
+    best_borrow, best_profit = _baseline_optimum(single_pool_arb)
+    assert abs(single_pool_arb.best["borrow"] - best_borrow) <= 1
+    assert single_pool_arb.best["profit"] == pytest.approx(best_profit, rel=1e-15)
+    assert single_pool_arb.best["profit"] == _profit(
+        single_pool_arb, single_pool_arb.best["borrow"]
+    )
+    assert single_pool_arb.best[
+        "swap_out"
+    ] == single_pool_arb.calculate_multipool_tokens_out_from_tokens_in(
+        token_in=wbtc,
+        token_in_quantity=single_pool_arb.best["borrow"],
+    )
+
+
+def test_multi_pool_grid_optimum(
+    multi_pool_arb: FlashBorrowToRouterSwap, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    best_borrow, best_profit = _baseline_optimum(multi_pool_arb)
+
+    # The integer swap outputs make the profit jagged at the scale of a few
+    # units of input, so compare the results within a small tolerance
+    borrow, profit, swap_out = multi_pool_arb._calculate_optimal_borrow_multi_pool()
+    assert borrow == pytest.approx(best_borrow, rel=1e-4)
+    assert profit == pytest.approx(best_profit, rel=1e-6)
+    assert profit == _profit(multi_pool_arb, borrow)
+    assert swap_out == multi_pool_arb.calculate_multipool_tokens_out_from_tokens_in(
+        token_in=wbtc,
+        token_in_quantity=borrow,
+    )
+
+    # Force the fallback to the bounded search over the full reserves
+    class UnusableBracket:
+        @staticmethod
+        def minimize_scalar(*args, **kwargs):
+            raise ValueError("Not a bracketing interval.")
+
+    monkeypatch.setattr(flash_borrow_to_router_swap, "optimize", UnusableBracket)
+    borrow, profit, swap_out = multi_pool_arb._calculate_optimal_borrow_multi_pool()
+    assert borrow == pytest.approx(best_borrow, rel=1e-4)
+    assert profit == pytest.approx(best_profit, rel=1e-6)
+    assert profit == _profit(multi_pool_arb, borrow)
+
+
+def test_marginal_profit_guard(
+    single_pool_arb: FlashBorrowToRouterSwap, w3: MockWeb3, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    assert single_pool_arb._has_marginal_profit() is True
+
+    # Make WBTC more expensive in the swap pool than in the borrow pool
+    swap_pool = single_pool_arb.swap_pools[0]
+    swap_pool.chain_reserves = (17000000000, 2500000000000000000000)
+    single_pool_arb.update_reserves(silent=True)
+    assert single_pool_arb._has_marginal_profit() is False
+    assert _baseline_optimum(single_pool_arb)[1] <= 0
+
+    # The optimizer should be skipped for the unprofitable state
+    def fail():
+        raise AssertionError("optimizer called")
+
+    single_pool_arb.best.update({"borrow": 1, "profit": 1, "swap_out": 1})
+    monkeypatch.setattr(single_pool_arb, "_calculate_arbitrage", fail)
+    w3.eth.block_number = 2
+    swap_pool.chain_reserves = (17000000001, 2500000000000000000000)
+    assert single_pool_arb.update_reserves(silent=True) is True
+    assert single_pool_arb.best["borrow"] == 0
+    assert single_pool_arb.best["profit"] == 0
+    assert single_pool_arb.best["swap_out"] == 0
+
+
+def test_marginal_profit_guard_with_empty_pool(
+    multi_pool_arb: FlashBorrowToRouterSwap, w3: MockWeb3
+) -> None:
+    # A drained pool anywhere along the path means no arbitrage, instead of
+    # a division by zero
+    for pool in (multi_pool_arb.borrow_pool, *multi_pool_arb.swap_pools):
+        reserves = pool.chain_reserves
+        w3.eth.block_number += 1
+        pool.chain_reserves = (0, 0)
+        assert multi_pool_arb.update_reserves(silent=True) is True
+        assert multi_pool_arb._has_marginal_profit() is False
+        assert multi_pool_arb.best["profit"] == 0
+
+        w3.eth.block_number += 1
+        pool.chain_reserves = reserves
+        assert multi_pool_arb.update_reserves(silent=True) is True
+        assert multi_pool_arb.best["profit"] > 0
+
+
+def test_repeated_state_reuses_last_result(
+    multi_pool_arb: FlashBorrowToRouterSwap, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    multi_pool_arb._calculate_arbitrage()
+    result = {key: multi_pool_arb.best[key] for key in ("borrow", "profit", "swap_out")}
+    assert result["profit"] > 0
+
+    def fail():
+        raise AssertionError("optimizer called")
+
+    monkeypatch.setattr(multi_pool_arb, "_calculate_optimal_borrow_multi_pool", fail)
+
+    # The same reserves restore the last result, even after the result was
+    # zeroed in between
+    multi_pool_arb.best.update({"borrow": 0, "profit": 0, "swap_out": 0})
+    multi_pool_arb._calculate_arbitrage()
+    assert {key: multi_pool_arb.best[key] for key in result} == result
+
+    # Changed reserves run the optimizer again
+    multi_pool_arb.swap_pools[0].reserves_token0 += 1
+    with pytest.raises(AssertionError, match="optimizer called"):
+        multi_pool_arb._calculate_arbitrage()
@@ -0,0 +1,28 @@
+import pytest
+from degenbot.arbitrage.solver import brent_bounded
+from scipy.optimize import minimize_scalar  # type: ignore[import]
+
+
+@pytest.mark.parametrize(
+    "func, bounds, xatol",
+    [
+        (lambda x: (x - 2.0) ** 2, (-10.0, 10.0), 1e-5),
+        (lambda x: -(x**0.5) + 0.001 * x, (1.0, 10**6), 1.0),
+        (lambda x: abs(x - 7.25), (0.0, 100.0), 1e-5),
+        # minimum at the lower bound
+        (lambda x: x, (1.0, 1e20), 1.0),
+    ],
+)
+def test_brent_bounded_matches_scipy(func, bounds, xatol):
+    opt = minimize_scalar(
+        func,
+        method="bounded",
+        bounds=bounds,
+        options={"xatol": xatol},
+    )
+    assert brent_bounded(func, *bounds, xatol=xatol) == (opt.x, opt.fun)
+
+
+def test_brent_bounded_rejects_inverted_bounds():
+    with pytest.raises(ValueError):
+        brent_bounded(lambda x: x, 1.0, 0.0)
@@ -1,20 +1,30 @@
 import asyncio
 import concurrent.futures
 import multiprocessing
+import pickle
 from fractions import Fraction
 from threading import Lock
 from typing import Sequence, Tuple, Union
 
+import eth_abi
 import pytest
 from degenbot.arbitrage import ArbitrageCalculationResult, UniswapLpCycle
 from degenbot.arbitrage.arbitrage_dataclasses import (
     UniswapV2PoolSwapAmounts,
     UniswapV3PoolSwapAmounts,
 )
+from degenbot.arbitrage.uniswap_lp_cycle import (
+    _encode_v2_swap_calldata,
+    _encode_v3_swap_calldata,
+)
 from degenbot.erc20_token import Erc20Token
 from degenbot.exceptions import ArbitrageError
 from degenbot.uniswap import V3LiquidityPool
-from degenbot.uniswap.v2_liquidity_pool import LiquidityPool, UniswapV2PoolState
+from degenbot.uniswap.v2_liquidity_pool import (
+    CamelotLiquidityPool,
+    LiquidityPool,
+    UniswapV2PoolState,
+)
 from degenbot.uniswap.v3_dataclasses import (
     UniswapV3BitmapAtWord,
     UniswapV3LiquidityAtTick,
@@ -34,6 +44,12 @@ class MockLiquidityPool(LiquidityPool):
         self._subscribers = set()
 
 
+class MockCamelotLiquidityPool(CamelotLiquidityPool):
+    def __init__(self):
+        self._state_lock = Lock()
+        self._subscribers = set()
+
+
 class MockV3LiquidityPool(V3LiquidityPool):
     def __init__(self):
         # self._liquidity_lock = Lock()
@@ -2090,6 +2106,41 @@ arb = UniswapLpCycle(
 )
 
 
+@pytest.fixture
+def v2_pools() -> Tuple[LiquidityPool, LiquidityPool]:
+    # Two externally-updated V2 pools at different prices, i.e. a profitable
+    # WETH -> WBTC -> WETH cycle when swapped in order
+    lp_1 = MockLiquidityPool()
+    lp_1.name = "WBTC-WETH (V2, 0.30%)"
+    lp_1.address = to_checksum_address("0xBb2b8038a1640196FbE3e38816F3e67Cba72D940")
+    lp_1.factory = to_checksum_address("0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f")
+    lp_1.fee = None
+    lp_1.fee_token0 = Fraction(3, 1000)
+    lp_1.fee_token1 = Fraction(3, 1000)
+    lp_1.reserves_token0 = 16000000000
+    lp_1.reserves_token1 = 2500000000000000000000
+    lp_1.token0 = wbtc
+    lp_1.token1 = weth
+    lp_1._update_method = "external"
+    lp_1._update_pool_state()
+
+    lp_2 = MockLiquidityPool()
+    lp_2.name = "WBTC-WETH (V2, 0.30%)"
+    lp_2.address = to_checksum_address("0x0000000000000000000000000000000000000069")
+    lp_2.factory = to_checksum_address("0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f")
+    lp_2.fee = None
+    lp_2.fee_token0 = Fraction(3, 1000)
+    lp_2.fee_token1 = Fraction(3, 1000)
+    lp_2.reserves_token0 = 15000000000
+    lp_2.reserves_token1 = 2500000000000000000000
+    lp_2.token0 = wbtc
+    lp_2.token1 = weth
+    lp_2._update_method = "external"
+    lp_2._update_pool_state()
+
+    return lp_1, lp_2
+
+
 def test_type_checks() -> None:
     # Need to ensure that the mocked helpers will pass the type checks
     # inside various methods
@@ -2099,6 +2150,19 @@ def test_type_checks() -> None:
     assert isinstance(wbtc, Erc20Token)
 
 
+def test_create_from_iterator() -> None:
+    # A single-use iterable should be consumed once and fully processed
+    cycle = UniswapLpCycle(
+        id="test_arb",
+        input_token=weth,
+        swap_pools=iter([v2_lp, v3_lp]),
+        max_input=100 * 10**18,
+    )
+    assert cycle.swap_pools == (v2_lp, v3_lp)
+    assert cycle in v2_lp._subscribers
+    assert cycle in v3_lp._subscribers
+
+
 def test_arbitrage_with_overrides() -> None:
     v2_pool_state_override = UniswapV2PoolState(
         pool=v2_lp,
@@ -2300,3 +2364,280 @@ def test_pre_calc_check() -> None:
             swap_pools=[lp_2, lp_1],
             max_input=100 * 10**18,
         ).calculate_arbitrage()
+
+
+def test_pre_calc_check_after_pool_update(v2_pools: Tuple[LiquidityPool, LiquidityPool]) -> None:
+    lp_1, lp_2 = v2_pools
+
+    cycle = UniswapLpCycle(
+        id="test_arb",
+        input_token=weth,
+        swap_pools=[lp_1, lp_2],
+        max_input=100 * 10**18,
+    )
+    cycle.calculate_arbitrage()
+
+    # Move the second pool price below the first, which should be caught by
+    # the check even though the previous check passed
+    lp_2.reserves_token0 = 17000000000
+    lp_2._update_pool_state()
+
+    with pytest.raises(ArbitrageError, match="No profitable arbitrage at current prices."):
+        cycle.calculate_arbitrage()
+
+
+def test_v2_only_cycle_analytic_optimum(v2_pools: Tuple[LiquidityPool, LiquidityPool]) -> None:
+    lp_1, lp_2 = v2_pools
+
+    cycle = UniswapLpCycle(
+        id="test_arb",
+        input_token=weth,
+        swap_pools=[lp_1, lp_2],
+        max_input=100 * 10**18,
+    )
+    result = cycle.calculate()
+    assert result.input_amount == 36087973095242614664
+    assert result.profit_amount == 1071710758539099776
+
+    # The closed-form optimum should not be worse than the bounded search
+    # result (36086551081481371648 input, 1071710748895621632 profit)
+    assert result.profit_amount >= 1071710748895621632
+
+
+def test_pickled_camelot_cycle(v2_pools: Tuple[LiquidityPool, LiquidityPool]) -> None:
+    lp_1, lp_2 = v2_pools
+
+    # A non-stable Camelot pool with the same reserves as lp_2
+    camelot_lp = MockCamelotLiquidityPool()
+    camelot_lp.name = "WBTC-WETH (Camelot)"
+    camelot_lp.address = lp_2.address
+    camelot_lp.factory = to_checksum_address("0x6EcCab422D763aC031210895C81787E87B43A652")
+    camelot_lp.fee = None
+    camelot_lp.fee_token0 = Fraction(3, 1000)
+    camelot_lp.fee_token1 = Fraction(3, 1000)
+    camelot_lp.reserves_token0 = lp_2.reserves_token0
+    camelot_lp.reserves_token1 = lp_2.reserves_token1
+    camelot_lp.token0 = wbtc
+    camelot_lp.token1 = weth
+    camelot_lp.stable_swap = False
+    camelot_lp._update_pool_state()
+
+    cycle = UniswapLpCycle(
+        id="test_arb",
+        input_token=weth,
+        swap_pools=[lp_1, camelot_lp],
+        max_input=100 * 10**18,
+    )
+
+    # Cycles are pickled when sent to a process pool, which must preserve the
+    # pool type flags read by the calculation
+    unpickled_cycle = pickle.loads(pickle.dumps(cycle))
+    assert unpickled_cycle.swap_pools[1].stable_swap is False
+    assert unpickled_cycle.calculate() == cycle.calculate()
+
+
+async def test_process_pool_calculate_many() -> None:
+    v3_pool_state_override = UniswapV3PoolState(
+        pool=v3_lp,
+        liquidity=1533143241938066251,
+        sqrt_price_x96=31881290961944305252140777263703426,
+        tick=258116,
+    )
+
+    overrides = [
+        (v3_lp, v3_pool_state_override),
+    ]
+
+    with concurrent.futures.ProcessPoolExecutor(
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        # Unprofitable cycles should return the exception instead of raising
+        results = await UniswapLpCycle.calculate_many(
+            cycles=[arb, arb],
+            executor=executor,
+        )
+        assert len(results) == 2
+        assert all(isinstance(result, ArbitrageError) for result in results)
+
+        results = await UniswapLpCycle.calculate_many(
+            cycles=[arb] * 16,
+            executor=executor,
+            override_state=overrides,
+            chunk_size=3,
+        )
+        assert len(results) == 16
+        for result in results:
+            assert isinstance(result, ArbitrageCalculationResult)
+            assert result.input_amount == 20454968409226055680
+            assert result.profit_amount == 163028226755627520
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        results = await UniswapLpCycle.calculate_many(
+            cycles=[arb] * 16,
+            executor=executor,
+            override_state=overrides,
+            max_workers=2,
+        )
+        assert len(results) == 16
+        assert all(isinstance(result, ArbitrageCalculationResult) for result in results)
+
+        with pytest.raises(ValueError):
+            await UniswapLpCycle.calculate_many(
+                cycles=[arb],
+                executor=executor,
+                chunk_size=0,
+            )
+        with pytest.raises(ValueError):
+            await UniswapLpCycle.calculate_many(
+                cycles=[arb],
+                executor=executor,
+                max_workers=0,
+            )
+
+
+def test_auto_update_sets_initial_pool_states(
+    v2_pools: Tuple[LiquidityPool, LiquidityPool],
+) -> None:
+    lp_1, lp_2 = v2_pools
+
+    cycle = UniswapLpCycle(
+        id="test_arb",
+        input_token=weth,
+        swap_pools=[lp_1, lp_2],
+        max_input=100 * 10**18,
+    )
+    assert cycle.pool_states == {lp_1.address: None, lp_2.address: None}
+    assert cycle._pool_states == [None, None]
+
+    # The first update records the states of all pools
+    assert cycle.auto_update() is True
+    assert cycle.pool_states == {lp_1.address: lp_1.state, lp_2.address: lp_2.state}
+    assert cycle._pool_states == [lp_1.state, lp_2.state]
+
+    # Nothing has changed since
+    assert cycle.auto_update() is False
+
+
+def test_generate_payloads() -> None:
+    from_address = to_checksum_address("0x0000000000000000000000000000000000000001")
+    swap_amounts = [
+        UniswapV2PoolSwapAmounts(
+            amounts=(127718318, 0),
+        ),
+        UniswapV3PoolSwapAmounts(
+            amount_specified=127718318,
+            zero_for_one=True,
+            sqrt_price_limit_x96=4295128740,
+        ),
+    ]
+
+    payloads = arb.generate_payloads(
+        from_address=from_address,
+        swap_amount=20454968409226055680,
+        pool_swap_amounts=swap_amounts,
+    )
+
+    # WETH transfer to the V2 pool, then swaps at the V2 and V3 pools
+    assert [address for address, _, _ in payloads] == [
+        weth.address,
+        v2_lp.address,
+        v3_lp.address,
+    ]
+    assert all(value == 0 for _, _, value in payloads)
+
+    transfer_calldata = payloads[0][1]
+    assert transfer_calldata[:4] == bytes.fromhex("a9059cbb")
+    assert transfer_calldata[4:] == eth_abi.encode(
+        types=("address", "uint256"),
+        args=(v2_lp.address, 20454968409226055680),
+    )
+
+    v2_swap_calldata = payloads[1][1]
+    assert v2_swap_calldata[:4] == bytes.fromhex("022c0d9f")
+    # V3 pools cannot accept a pre-swap transfer, so the V2 swap output is
+    # sent to the executing contract
+    assert v2_swap_calldata[4:] == eth_abi.encode(
+        types=("uint256", "uint256", "address", "bytes"),
+        args=(127718318, 0, from_address, b""),
+    )
+
+    v3_swap_calldata = payloads[2][1]
+    assert v3_swap_calldata[:4] == bytes.fromhex("128acb08")
+    assert v3_swap_calldata[4:] == eth_abi.encode(
+        types=("address", "bool", "int256", "uint160", "bytes"),
+        args=(
+            from_address,
+            True,
+            127718318,
+            4295128740,
+            b"",
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "zero_for_one, amount_specified, sqrt_price_limit_x96",
+    [
+        (True, 1, 4295128740),
+        (False, -(10**18), 1461446703485210103287273052203988822378723970341),
+        (True, 2**255 - 1, 2**160 - 1),
+        (False, -(2**255), 0),
+    ],
+)
+def test_payload_encoders_match_eth_abi(zero_for_one, amount_specified, sqrt_price_limit_x96):
+    address = v3_lp.address
+    assert _encode_v2_swap_calldata(0, 2**256 - 1, address)[4:] == eth_abi.encode(
+        types=("uint256", "uint256", "address", "bytes"),
+        args=(0, 2**256 - 1, address, b""),
+    )
+    v3_calldata = _encode_v3_swap_calldata(
+        address, zero_for_one, amount_specified, sqrt_price_limit_x96
+    )
+    assert v3_calldata[4:] == eth_abi.encode(
+        types=("address", "bool", "int256", "uint160", "bytes"),
+        args=(address, zero_for_one, amount_specified, sqrt_price_limit_x96, b""),
+    )
+
+
+def test_payload_encoders_reject_out_of_range_values():
+    with pytest.raises(ValueError):
+        _encode_v2_swap_calldata(-1, 0, v3_lp.address)
+    with pytest.raises(ValueError):
+        _encode_v2_swap_calldata(0, 2**256, v3_lp.address)
+    with pytest.raises(ValueError):
+        _encode_v3_swap_calldata(v3_lp.address, True, 2**255, 4295128740)
+    with pytest.raises(ValueError):
+        _encode_v3_swap_calldata(v3_lp.address, True, 1, 2**160)
+
+
+def test_generate_payloads_with_invalid_amounts() -> None:
+    from_address = to_checksum_address("0x0000000000000000000000000000000000000001")
+    with pytest.raises(ArbitrageError):
+        arb.generate_payloads(
+            from_address=from_address,
+            swap_amount=-1,
+            pool_swap_amounts=[
+                UniswapV2PoolSwapAmounts(
+                    amounts=(127718318, 0),
+                ),
+                UniswapV3PoolSwapAmounts(
+                    amount_specified=127718318,
+                    zero_for_one=True,
+                    sqrt_price_limit_x96=4295128740,
+                ),
+            ],
+        )
+
+
+def test_generate_payloads_with_missing_amounts() -> None:
+    from_address = to_checksum_address("0x0000000000000000000000000000000000000001")
+    with pytest.raises(ArbitrageError):
+        arb.generate_payloads(
+            from_address=from_address,
+            swap_amount=20454968409226055680,
+            pool_swap_amounts=[
+                UniswapV2PoolSwapAmounts(
+                    amounts=(127718318, 0),
+                ),
+            ],
+        )
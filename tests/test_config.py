@@ -0,0 +1,22 @@
+from degenbot import build_http_web3
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider, Web3
+from web3._utils.request import cache_and_return_session
+
+
+def test_build_http_web3():
+    endpoint_uri = "http://localhost:8545/test_build_http_web3"
+
+    w3 = build_http_web3(endpoint_uri, pool_size=25, timeout=5)
+    assert isinstance(w3, Web3)
+    assert isinstance(w3.provider, HTTPProvider)
+    assert w3.provider.endpoint_uri == endpoint_uri
+    assert w3.provider.get_request_kwargs()["timeout"] == 5
+
+    # the provider uses the pooled session for its endpoint
+    session = cache_and_return_session(w3.provider.endpoint_uri)
+    for prefix in ("http://", "https://"):
+        adapter = session.get_adapter(prefix)
+        assert isinstance(adapter, HTTPAdapter)
+        assert adapter._pool_connections == 25
+        assert adapter._pool_maxsize == 25
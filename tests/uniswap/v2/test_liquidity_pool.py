@@ -1,5 +1,6 @@
 import pickle
 from fractions import Fraction
+from threading import Lock
 from typing import Dict
 
 import degenbot
@@ -8,6 +9,7 @@ import web3
 from degenbot import Erc20Token
 from degenbot.exceptions import NoPoolStateAvailable, ZeroSwapError
 from degenbot.uniswap import LiquidityPool, UniswapV2PoolSimulationResult, UniswapV2PoolState
+from degenbot.uniswap.v2_liquidity_pool import CamelotLiquidityPool
 from eth_utils import to_checksum_address
 
 degenbot.set_web3(web3.Web3(web3.HTTPProvider(("http://localhost:8545"))))
@@ -18,6 +20,12 @@ class MockErc20Token(Erc20Token):
         pass
 
 
+class MockCamelotLiquidityPool(CamelotLiquidityPool):
+    def __init__(self):
+        self._state_lock = Lock()
+        self._subscribers = set()
+
+
 # Tests are based on the WBTC-WETH Uniswap V2 pool on Ethereum mainnet,
 # evaluated against the results from the Uniswap V2 Router 2 contract
 # functions `getAmountsOut` and `getAmountsIn`
@@ -150,6 +158,78 @@ def test_calculate_tokens_out_from_tokens_in(wbtc_weth_liquiditypool: LiquidityP
     )
 
 
+def test_calculate_tokens_out_from_tokens_in_raw(wbtc_weth_liquiditypool: LiquidityPool) -> None:
+    # Reserve values for this test are taken at block height 17,600,000
+
+    assert wbtc_weth_liquiditypool.calculate_tokens_out_from_tokens_in_raw(
+        True,
+        8000000000,
+    ) == wbtc_weth_liquiditypool.calculate_tokens_out_from_tokens_in(
+        wbtc_weth_liquiditypool.token0,
+        8000000000,
+    )
+    assert wbtc_weth_liquiditypool.calculate_tokens_out_from_tokens_in_raw(
+        False,
+        1200000000000000000000,
+    ) == wbtc_weth_liquiditypool.calculate_tokens_out_from_tokens_in(
+        wbtc_weth_liquiditypool.token1,
+        1200000000000000000000,
+    )
+
+    with pytest.raises(ZeroSwapError):
+        wbtc_weth_liquiditypool.calculate_tokens_out_from_tokens_in_raw(True, 0)
+
+
+def test_calculate_tokens_out_from_tokens_in_raw_camelot_stable_pool() -> None:
+    token0 = MockErc20Token()
+    token0.address = to_checksum_address("0xFd086bC7CD5C481DCC9C85ebE478A1C0b69FCbb9")
+    token0.decimals = 6
+    token0.name = "Tether USD"
+    token0.symbol = "USDT"
+
+    token1 = MockErc20Token()
+    token1.address = to_checksum_address("0xFF970A61A04b1cA14834A43f5dE4533eBDDB5CC8")
+    token1.decimals = 6
+    token1.name = "USD Coin (Arb1)"
+    token1.symbol = "USDC"
+
+    lp = MockCamelotLiquidityPool()
+    lp.address = to_checksum_address("0x1C31fB3359357f6436565cCb3E982Bc6Bf4189ae")
+    lp.name = "USDT-USDC (Camelot, stable)"
+    lp.fee_token0 = Fraction(4, 10000)
+    lp.fee_token1 = Fraction(4, 10000)
+    lp.reserves_token0 = 1_000_000 * 10**6
+    lp.reserves_token1 = 1_100_000 * 10**6
+    lp.token0 = token0
+    lp.token1 = token1
+    lp.stable_swap = True
+
+    stable_amount_out = lp._calculate_tokens_out_from_tokens_in_stable_swap(
+        token_in=token0,
+        token_in_quantity=10_000 * 10**6,
+    )
+    assert lp.calculate_tokens_out_from_tokens_in_raw(True, 10_000 * 10**6) == stable_amount_out
+    assert lp.calculate_tokens_out_from_tokens_in_raw(
+        False, 10_000 * 10**6
+    ) == lp._calculate_tokens_out_from_tokens_in_stable_swap(
+        token_in=token1,
+        token_in_quantity=10_000 * 10**6,
+    )
+
+    # The stable-swap calculation must survive pickling
+    unpickled_lp = pickle.loads(pickle.dumps(lp))
+    assert unpickled_lp.calculate_tokens_out_from_tokens_in_raw(True, 10_000 * 10**6) == (
+        stable_amount_out
+    )
+
+    # Non-stable pools use the constant product calculation
+    lp.stable_swap = False
+    assert lp.calculate_tokens_out_from_tokens_in_raw(
+        True, 10_000 * 10**6
+    ) == LiquidityPool.calculate_tokens_out_from_tokens_in_raw(lp, True, 10_000 * 10**6)
+    assert lp.calculate_tokens_out_from_tokens_in_raw(True, 10_000 * 10**6) != stable_amount_out
+
+
 def test_calculate_tokens_out_from_tokens_in_with_override(
     wbtc_weth_liquiditypool: LiquidityPool
 ) -> None:
@@ -203,6 +283,25 @@ def test_calculate_tokens_in_from_tokens_out(wbtc_weth_liquiditypool: LiquidityP
     )
 
 
+def test_calculate_tokens_in_from_tokens_out_raw(wbtc_weth_liquiditypool: LiquidityPool) -> None:
+    # Reserve values for this test are taken at block height 17,600,000
+
+    assert wbtc_weth_liquiditypool.calculate_tokens_in_from_tokens_out_raw(
+        True,
+        1200000000000000000000,
+    ) == wbtc_weth_liquiditypool.calculate_tokens_in_from_tokens_out(
+        1200000000000000000000,
+        token_out=wbtc_weth_liquiditypool.token1,
+    )
+    assert wbtc_weth_liquiditypool.calculate_tokens_in_from_tokens_out_raw(
+        False,
+        8000000000,
+    ) == wbtc_weth_liquiditypool.calculate_tokens_in_from_tokens_out(
+        8000000000,
+        token_out=wbtc_weth_liquiditypool.token0,
+    )
+
+
 def test_calculate_tokens_in_from_tokens_out_with_override(
     wbtc_weth_liquiditypool: LiquidityPool
 ) -> None: